@@ -0,0 +1,102 @@
+"""Compare lookup times with and without the init_db() secondary indexes.
+
+Builds a throwaway database (1M inventory rows and 1M estimate line items by
+default), times the hot lookups with the indexes in place, drops them and
+times the same lookups again.
+
+    python bench_indexes.py [--rows 1000000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--repeat", type=int, default=50)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp()
+os.environ["INVENTORY_DB"] = os.path.join(workdir, "bench.db")
+import main  # noqa: E402  (must see INVENTORY_DB)
+
+QUERIES = {
+    "inventory by job": ("SELECT * FROM inventory WHERE assigned_job_id = ?", "job"),
+    "jobs by client": ("SELECT * FROM jobs WHERE client_account_id = ?", "client"),
+    "jobs by crew": ("SELECT * FROM jobs WHERE crew_id = ?", "crew"),
+    "jobs by date": ("SELECT * FROM jobs WHERE scheduled_date = ?", "date"),
+    "estimate line items": ("SELECT * FROM estimate_materials WHERE estimate_id = ?", "estimate"),
+    "estimates by client+status": ("SELECT * FROM estimates WHERE client_id = ? AND status = 'pending'", "client"),
+    "crew members": ("""SELECT e.* FROM employees e
+                        JOIN crew_members cm ON e.employee_id = cm.employee_id
+                        WHERE cm.crew_id = ?""", "crew"),
+    "materials by type+vendor": ("SELECT * FROM materials WHERE type_id = ? AND vendor_id = ?", "material"),
+}
+
+
+def populate(conn, rows):
+    clients, crews, jobs, estimates = rows // 100, 100, rows // 10, rows // 10
+    rnd = random.Random(1)
+    conn.executemany("INSERT INTO clients (name, address, phone) VALUES (?, '', '')",
+                     ((f"client {i}",) for i in range(clients)))
+    conn.executemany("INSERT INTO work_crews (name) VALUES (?)", ((f"crew {i}",) for i in range(crews)))
+    conn.executemany("INSERT INTO employees (name) VALUES (?)", ((f"emp {i}",) for i in range(crews * 4)))
+    conn.executemany("INSERT INTO crew_members (crew_id, employee_id) VALUES (?, ?)",
+                     ((i // 4 + 1, i + 1) for i in range(crews * 4)))
+    conn.executemany("INSERT INTO vendors (name) VALUES (?)", ((f"vendor {i}",) for i in range(50)))
+    conn.executemany(
+        "INSERT INTO jobs (job_id, client_account_id, crew_id, address, scheduled_date, cost_estimate) VALUES (?, ?, ?, '', ?, 0)",
+        ((f"J{i}", rnd.randint(1, clients), rnd.randint(1, crews), f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}")
+         for i in range(jobs)))
+    conn.executemany(
+        "INSERT INTO inventory (type, quantity, cost, cost_markup, assigned_job_id) VALUES ('Rebar', 1, 1, 0, ?)",
+        ((f"J{rnd.randrange(jobs)}",) for _ in range(rows)))
+    conn.executemany(
+        "INSERT INTO estimates (client_id, status, date_created, date_updated) VALUES (?, ?, '', '')",
+        ((rnd.randint(1, clients), rnd.choice(["pending", "accepted", "rejected"])) for _ in range(estimates)))
+    conn.executemany("INSERT INTO estimate_materials (estimate_id, description) VALUES (?, 'x')",
+                     ((rnd.randint(1, estimates),) for _ in range(rows)))
+    conn.executemany(
+        "INSERT INTO materials (type_id, vendor_id) VALUES (?, ?)",
+        ((rnd.randint(1, 6), rnd.randint(1, 50)) for _ in range(rows // 10)))
+    conn.commit()
+    return {
+        "job": lambda: f"J{rnd.randrange(jobs)}",
+        "client": lambda: rnd.randint(1, clients),
+        "crew": lambda: rnd.randint(1, crews),
+        "date": lambda: f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+        "estimate": lambda: rnd.randint(1, estimates),
+        "material": lambda: (rnd.randint(1, 6), rnd.randint(1, 50)),
+    }
+
+
+def run(conn, keys):
+    timings = {}
+    for name, (sql, key) in QUERIES.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            value = keys[key]()
+            conn.execute(sql, value if isinstance(value, tuple) else (value,)).fetchall()
+        timings[name] = (time.perf_counter() - start) / args.repeat * 1000
+    return timings
+
+
+main.init_db()
+with main.get_db() as conn:
+    print(f"populating {args.rows:,} rows ...")
+    keys = populate(conn, args.rows)
+    indexed = run(conn, keys)
+    for statement in main.SCHEMA_MIGRATIONS[0] + main.SCHEMA_MIGRATIONS[1]:
+        if statement.startswith("CREATE INDEX"):
+            conn.execute("DROP INDEX IF EXISTS " + re.search(r"EXISTS (\w+)", statement).group(1))
+    conn.commit()
+    unindexed = run(conn, keys)
+
+print(f"{'lookup':<30}{'no index (ms)':>15}{'indexed (ms)':>15}{'speedup':>10}")
+for name in QUERIES:
+    print(f"{name:<30}{unindexed[name]:>15.3f}{indexed[name]:>15.3f}{unindexed[name] / indexed[name]:>9.0f}x")
+main.pool.close()
+shutil.rmtree(workdir)
@@ -0,0 +1,78 @@
+"""Compare list serialization with and without FAST_JSON_RESPONSES.
+
+Builds a throwaway database (100k rows per table by default) and times full
+GET /inventory, /jobs, /materials and /clients requests through the app, first with
+response-model validation, then with the rows encoded straight to JSON.
+
+    python bench_serialization.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--rows", type=int, default=100_000)
+parser.add_argument("--repeat", type=int, default=5)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp()
+os.environ["INVENTORY_DB"] = os.path.join(workdir, "bench.db")
+import main  # noqa: E402  (must see INVENTORY_DB)
+from fastapi.testclient import TestClient  # noqa: E402
+
+PATHS = ("/inventory", "/jobs", "/materials", "/clients")
+
+
+def populate(conn, rows):
+    rnd = random.Random(1)
+    conn.executemany("INSERT INTO clients (name, address, phone) VALUES (?, '', '')",
+                     ((f"client {i}",) for i in range(100)))
+    conn.executemany("INSERT INTO vendors (name) VALUES (?)", ((f"vendor {i}",) for i in range(50)))
+    conn.executemany(
+        "INSERT INTO jobs (job_id, client_account_id, address, scheduled_date, cost_estimate) VALUES (?, ?, ?, ?, ?)",
+        ((f"J{i}", rnd.randint(1, 100), f"{i} Main St", f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+          rnd.random() * 10000) for i in range(rows)))
+    conn.executemany(
+        "INSERT INTO inventory (type, quantity, cost, cost_markup, assigned_job_id) VALUES (?, ?, ?, ?, ?)",
+        ((rnd.choice(["Rebar", "Tubing", "Sheet"]), rnd.randint(1, 100), rnd.random() * 100, 0.15,
+          f"J{rnd.randrange(rows)}" if rnd.random() < 0.5 else None) for _ in range(rows)))
+    conn.executemany(
+        "INSERT INTO materials (type_id, vendor_id, price_paid_per_unit, units_held, description) VALUES (?, ?, ?, ?, ?)",
+        ((rnd.randint(1, 6), rnd.randint(1, 50), rnd.random() * 50, rnd.randint(0, 500), f"item {i}")
+         for i in range(rows)))
+    conn.commit()
+
+
+def run(client):
+    timings = {}
+    for path in PATHS:
+        client.get(path, headers={"Accept-Encoding": "identity"})
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            response = client.get(path, headers={"Accept-Encoding": "identity"})
+            response.raise_for_status()
+        timings[path] = (time.perf_counter() - start) / args.repeat * 1000
+    return timings, {path: client.get(path).json() for path in PATHS}
+
+
+main.init_db()
+with main.get_db() as conn:
+    print(f"populating {args.rows:,} rows per table ...")
+    populate(conn, args.rows)
+
+client = TestClient(main.app)
+main.FAST_JSON_RESPONSES = False
+validated, expected = run(client)
+main.FAST_JSON_RESPONSES = True
+fast, actual = run(client)
+
+print(f"encoder: {'orjson' if main.orjson else 'json'}")
+print(f"{'request':<20}{'validated (ms)':>16}{'fast (ms)':>12}{'speedup':>10}  same output")
+for path in PATHS:
+    print(f"{'GET ' + path:<20}{validated[path]:>16.1f}{fast[path]:>12.1f}{validated[path] / fast[path]:>9.1f}x"
+          f"  {expected[path] == actual[path]}")
+main.pool.close()
+shutil.rmtree(workdir)
@@ -1,34 +1,652 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, get_args
 from datetime import date, datetime
 import sqlite3
 import os
-from contextlib import contextmanager
-
-app = FastAPI(title="Metal Fabrication Inventory API")
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173", "https://dapper-kitsune-d5bc74.netlify.app"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+import asyncio
+import json
+import base64
+import csv
+import io
+import logging
+import queue
+import threading
+import time
+import gzip
+import tempfile
+import uuid
+import contextvars
+import functools
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager, asynccontextmanager
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks, run a single worker
+    fcntl = None
+
+logger = logging.getLogger("uvicorn.error")
+
+@asynccontextmanager
+async def lifespan(app):
+    init_db_once()
+    check_db_settings()
+    if WORKERS > 1:
+        notifier.start()
+    yield
+    notifier.stop()
+    writer.close()
+    pool.close()
+
+app = FastAPI(title="Metal Fabrication Inventory API", lifespan=lifespan)
 
 # Database setup - use absolute path
-DB_NAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inventory.db")
+DB_NAME = os.environ.get("INVENTORY_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "inventory.db"))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
+# Applied to every new connection, in this order (journal_mode has to be set
+# before anything opens a transaction). Override any of them with
+# DB_PRAGMA_<NAME>, e.g. DB_PRAGMA_JOURNAL_MODE=delete.
+DB_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": "5000",
+    "foreign_keys": "on",
+    "cache_size": "-16000",
+    "mmap_size": "268435456",
+    "temp_store": "memory",
+}
+for _name in DB_PRAGMAS:
+    DB_PRAGMAS[_name] = os.environ.get(f"DB_PRAGMA_{_name.upper()}", DB_PRAGMAS[_name])
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by the request threads.
+
+    Idle connections are handed out most-recently-used first so their page
+    cache stays warm, and each one is pinged before it is checked out.
+    """
+
+    def __init__(self, database, size, timeout):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._max_wait = 0.0
+        self._created = 0
+        self._discarded = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in DB_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._created += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._discarded += 1
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        waited = 0.0
+        if not self._slots.acquire(blocking=False):
+            start = time.perf_counter()
+            acquired = self._slots.acquire(timeout=self.timeout)
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._waits += 1
+                self._max_wait = max(self._max_wait, waited)
+            if not acquired:
+                raise HTTPException(status_code=503, detail="Database connection pool exhausted")
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._connect()
+                    break
+                if not self._healthy(conn):
+                    self._discard(conn)
+                    conn = None
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+        return conn
+
+    def release(self, conn):
+        try:
+            # Anything left uncommitted (e.g. a handler that raised) is
+            # discarded, same as closing the connection used to do
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+        except sqlite3.Error:
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "created": self._created,
+                "discarded": self._discarded,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+            }
+
+pool = ConnectionPool(DB_NAME, DB_POOL_SIZE, DB_POOL_TIMEOUT)
+
+# Set by POST /batch and the writer thread: every handler they run gets this
+# one connection instead of a pooled one, and work registered with
+# on_commit() (change events, cache invalidation) waits until the commit.
+batch_connection = contextvars.ContextVar("batch_connection", default=None)
+after_commit = contextvars.ContextVar("after_commit", default=None)
+
+def on_commit(callback):
+    """Call `callback` now, or after the enclosing batch or group commit."""
+    pending = after_commit.get()
+    if pending is None:
+        callback()
+    else:
+        pending.append(callback)
+
+class BatchConnection:
+    """Connection shared by the requests of a batch or a writer group. Their
+    commit() and rollback() calls are ignored; each request is settled with a
+    savepoint and the transaction is committed once at the end. `dirty` holds
+    the reference tables written so far, which must bypass the cache."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.dirty = set()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
 
 @contextmanager
 def get_db():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
+    shared = batch_connection.get()
+    if shared is not None:
+        yield shared
+        return
+    conn = pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.release(conn)
+
+# Route handlers are async; their blocking SQLite work runs on a dedicated
+# executor per workload instead of the shared AnyIO threadpool, so a burst of
+# reports can't starve ordinary reads and writes, and idle connections (SSE,
+# slow clients) don't hold a thread. Streaming exports read their chunks on
+# their own executor too, since each one walks a whole table.
+DB_EXECUTOR_WORKERS = {
+    "read": int(os.environ.get("DB_READ_WORKERS", "4")),
+    "write": int(os.environ.get("DB_WRITE_WORKERS", "2")),
+    "report": int(os.environ.get("DB_REPORT_WORKERS", "2")),
+    "export": int(os.environ.get("DB_EXPORT_WORKERS", "2")),
+}
+db_executors = {kind: ThreadPoolExecutor(workers, thread_name_prefix=f"db-{kind}")
+                for kind, workers in DB_EXECUTOR_WORKERS.items()}
+db_executor_pending = dict.fromkeys(db_executors, 0)
+
+async def run_db(kind, func, *args, **kwargs):
+    """Run blocking `func` on the `kind` executor, keeping contextvars (batch state)."""
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    db_executor_pending[kind] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(db_executors[kind], call)
+    finally:
+        db_executor_pending[kind] -= 1
+
+# All writes go through one thread that owns the only write connection, so
+# requests never race each other for SQLite's write lock. It takes whatever
+# is queued (up to WRITER_MAX_GROUP jobs), runs each in its own savepoint
+# inside one transaction and commits once for the whole group.
+DB_SINGLE_WRITER = os.environ.get("DB_SINGLE_WRITER", "1").lower() in ("1", "true", "yes", "on")
+WRITER_MAX_GROUP = int(os.environ.get("WRITER_MAX_GROUP", "64"))
+
+class Writer:
+    """Single writer thread with group commit.
+
+    submit() queues a blocking write function and returns a Future. A job
+    that raises is rolled back to its savepoint without affecting the rest
+    of its group; on_commit() callbacks of the others run after the commit.
+    """
+
+    def __init__(self, max_group):
+        self.max_group = max_group
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.groups = 0
+        self.failed = 0
+        self.largest_group = 0
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self._queue.put((contextvars.copy_context(), func, args, kwargs, future))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+        return future
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self):
+        conn = pool._connect()
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    break
+                group = [job]
+                while len(group) < self.max_group:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        self._queue.put(None)
+                        break
+                    group.append(job)
+                self._run_group(conn, group)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _call(shared, callbacks, func, args, kwargs):
+        batch_connection.set(shared)
+        after_commit.set(callbacks)
+        return func(*args, **kwargs)
+
+    def _run_group(self, conn, group):
+        shared = BatchConnection(conn)
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for context, func, args, kwargs, future in group:
+                # A caller that gave up (e.g. a disconnected client) cancels its future
+                if not future.set_running_or_notify_cancel():
+                    continue
+                callbacks = []
+                conn.execute("SAVEPOINT writer_job")
+                try:
+                    result = context.run(self._call, shared, callbacks, func, args, kwargs)
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO writer_job")
+                    outcomes.append((future, None, exc, ()))
+                else:
+                    outcomes.append((future, result, None, callbacks))
+                conn.execute("RELEASE writer_job")
+            conn.commit()
+        except Exception as exc:
+            logger.exception("Write group of %d failed", len(group))
+            if conn.in_transaction:
+                conn.rollback()
+            outcomes = [(future, None, exc, ()) for _, _, _, _, future in group if not future.cancelled()]
+        with self._lock:
+            self.jobs += len(group)
+            self.groups += 1
+            self.failed += sum(1 for outcome in outcomes if outcome[2] is not None)
+            self.largest_group = max(self.largest_group, len(group))
+        # Nothing below may raise: an exception here would kill the writer thread
+        for future, result, exc, callbacks in outcomes:
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("on_commit callback failed")
+            try:
+                if exc is not None:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+            except InvalidStateError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"enabled": DB_SINGLE_WRITER, "jobs": self.jobs, "groups": self.groups, "failed": self.failed,
+                    "largest_group": self.largest_group, "queued": self._queue.qsize()}
+
+writer = Writer(WRITER_MAX_GROUP)
+
+async def submit_write(func, *args, **kwargs):
+    """Run blocking write `func` on the writer thread, or directly on the write
+    executor when it is already part of a batch (or DB_SINGLE_WRITER is off)."""
+    if DB_SINGLE_WRITER and batch_connection.get() is None:
+        return await asyncio.wrap_future(writer.submit(func, *args, **kwargs))
+    return await run_db("write", func, *args, **kwargs)
+
+def write_now(func, *args, **kwargs):
+    """submit_write() for background threads: blocks until `func` has committed."""
+    if DB_SINGLE_WRITER and batch_connection.get() is None:
+        return writer.submit(func, *args, **kwargs).result()
+    return func(*args, **kwargs)
+
+def db_task(kind):
+    """Expose a blocking handler as an async route that runs on the `kind` executor.
+
+    Writes go through submit_write() instead.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        async def handler(*args, **kwargs):
+            if kind == "write":
+                return await submit_write(func, *args, **kwargs)
+            return await run_db(kind, func, *args, **kwargs)
+        return handler
+    return decorate
+
+def db_executor_stats():
+    return {kind: {"workers": DB_EXECUTOR_WORKERS[kind], "pending": db_executor_pending[kind]} for kind in db_executors}
+
+# Summary tables behind the dashboard reports, kept current by triggers so
+# every write path (single, bulk, direct SQL) updates them. Rows whose count
+# drops to zero are left in place and skipped on read.
+AGGREGATE_TABLES = [
+    """CREATE TABLE IF NOT EXISTS job_month_totals (
+        month TEXT PRIMARY KEY,
+        job_count INTEGER NOT NULL DEFAULT 0,
+        total_estimate REAL NOT NULL DEFAULT 0,
+        total_actual REAL NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS vendor_spend_totals (
+        vendor_key INTEGER PRIMARY KEY,
+        material_count INTEGER NOT NULL DEFAULT 0,
+        total_units REAL NOT NULL DEFAULT 0,
+        total_value REAL NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS type_valuation_totals (
+        source TEXT NOT NULL,
+        type_key TEXT NOT NULL,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        total_value REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (source, type_key)
+    )""",
+]
+
+def aggregate_upserts(ref, sign):
+    """Statements adding (sign '+') or removing (sign '-') trigger row `ref` from the totals."""
+    return {
+        "jobs": f"""INSERT INTO job_month_totals (month, job_count, total_estimate, total_actual)
+            VALUES (substr({ref}.scheduled_date, 1, 7), {sign}1, {sign}{ref}.cost_estimate,
+                    {sign}COALESCE({ref}.actual_total_cost, 0))
+            ON CONFLICT (month) DO UPDATE SET job_count = job_count + excluded.job_count,
+                total_estimate = total_estimate + excluded.total_estimate,
+                total_actual = total_actual + excluded.total_actual;""",
+        "materials": f"""INSERT INTO vendor_spend_totals (vendor_key, material_count, total_units, total_value)
+            VALUES (COALESCE({ref}.vendor_id, 0), {sign}1, {sign}COALESCE({ref}.units_held, 0),
+                    {sign}COALESCE({ref}.price_paid_per_unit * {ref}.units_held, 0))
+            ON CONFLICT (vendor_key) DO UPDATE SET material_count = material_count + excluded.material_count,
+                total_units = total_units + excluded.total_units,
+                total_value = total_value + excluded.total_value;
+            INSERT INTO type_valuation_totals (source, type_key, item_count, total_value)
+            VALUES ('materials', {ref}.type_id, {sign}1, {sign}COALESCE({ref}.price_paid_per_unit * {ref}.units_held, 0))
+            ON CONFLICT (source, type_key) DO UPDATE SET item_count = item_count + excluded.item_count,
+                total_value = total_value + excluded.total_value;""",
+        "inventory": f"""INSERT INTO type_valuation_totals (source, type_key, item_count, total_value)
+            VALUES ('inventory', {ref}.type, {sign}1, {sign}({ref}.cost * {ref}.quantity))
+            ON CONFLICT (source, type_key) DO UPDATE SET item_count = item_count + excluded.item_count,
+                total_value = total_value + excluded.total_value;""",
+    }
+
+AGGREGATE_TRIGGERS = []
+for _table in ("jobs", "materials", "inventory"):
+    AGGREGATE_TRIGGERS += [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{_table}_totals_insert AFTER INSERT ON {_table} BEGIN
+            {aggregate_upserts("NEW", "+")[_table]}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{_table}_totals_delete AFTER DELETE ON {_table} BEGIN
+            {aggregate_upserts("OLD", "-")[_table]}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{_table}_totals_update AFTER UPDATE ON {_table} BEGIN
+            {aggregate_upserts("OLD", "-")[_table]}
+            {aggregate_upserts("NEW", "+")[_table]}
+        END""",
+    ]
+
+# Recomputes every summary table from the base tables (drift repair).
+AGGREGATE_REBUILD = [
+    "DELETE FROM job_month_totals",
+    """INSERT INTO job_month_totals (month, job_count, total_estimate, total_actual)
+       SELECT substr(scheduled_date, 1, 7), COUNT(*), SUM(cost_estimate), SUM(COALESCE(actual_total_cost, 0))
+       FROM jobs GROUP BY 1""",
+    "DELETE FROM vendor_spend_totals",
+    """INSERT INTO vendor_spend_totals (vendor_key, material_count, total_units, total_value)
+       SELECT COALESCE(vendor_id, 0), COUNT(*), SUM(COALESCE(units_held, 0)),
+              SUM(COALESCE(price_paid_per_unit * units_held, 0))
+       FROM materials GROUP BY 1""",
+    "DELETE FROM type_valuation_totals",
+    """INSERT INTO type_valuation_totals (source, type_key, item_count, total_value)
+       SELECT 'materials', type_id, COUNT(*), SUM(COALESCE(price_paid_per_unit * units_held, 0))
+       FROM materials GROUP BY type_id""",
+    """INSERT INTO type_valuation_totals (source, type_key, item_count, total_value)
+       SELECT 'inventory', type, COUNT(*), SUM(cost * quantity)
+       FROM inventory GROUP BY type""",
+]
+
+# Row-level change tracking for GET /sync. Triggers record the latest change
+# per row in change_log; INSERT OR REPLACE gives it a fresh, monotonically
+# increasing version, so the log holds one entry (or tombstone) per row.
+SYNC_TABLES = {
+    "clients": "account_id",
+    "jobs": "job_id",
+    "inventory": "item_id",
+    "estimates": "estimate_id",
+    "estimate_materials": "material_id",
+    "material_types": "type_id",
+    "vendors": "vendor_id",
+    "materials": "material_id",
+    "employees": "employee_id",
+    "work_crews": "crew_id",
+    "crew_members": "id",
+}
+
+# Older databases (the committed inventory.db among them) declare
+# clients.account_id as TEXT PRIMARY KEY, which keeps ids as strings and gives
+# new rows a NULL key. Rebuild the table with an INTEGER key, keeping every
+# numeric id, before the change_log triggers rely on it.
+CLIENT_KEY_REBUILD = [
+    """CREATE TABLE clients_rebuilt (
+        account_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        address TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'active'
+    )""",
+    """INSERT INTO clients_rebuilt (account_id, name, address, phone, status)
+       SELECT CASE WHEN account_id GLOB '[0-9]*' AND account_id NOT GLOB '*[^0-9]*'
+                   THEN CAST(account_id AS INTEGER) END,
+              name, address, phone, COALESCE(status, 'active')
+       FROM clients ORDER BY account_id IS NULL, rowid""",
+    "DROP TABLE clients",
+    "ALTER TABLE clients_rebuilt RENAME TO clients",
+]
+
+CHANGE_LOG_SCHEMA = CLIENT_KEY_REBUILD + [
+    # row_id is deliberately untyped so integer keys stay integers
+    """CREATE TABLE IF NOT EXISTS change_log (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id NOT NULL,
+        deleted INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (table_name, row_id)
+    )""",
+]
+for _table, _key in SYNC_TABLES.items():
+    CHANGE_LOG_SCHEMA += [
+        f"INSERT OR REPLACE INTO change_log (table_name, row_id) SELECT '{_table}', {_key} FROM {_table}",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{_table}_log_insert AFTER INSERT ON {_table} BEGIN
+            INSERT OR REPLACE INTO change_log (table_name, row_id, deleted) VALUES ('{_table}', NEW.{_key}, 0);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{_table}_log_update AFTER UPDATE ON {_table} BEGIN
+            INSERT OR REPLACE INTO change_log (table_name, row_id, deleted)
+                SELECT '{_table}', OLD.{_key}, 1 WHERE OLD.{_key} IS NOT NEW.{_key};
+            INSERT OR REPLACE INTO change_log (table_name, row_id, deleted) VALUES ('{_table}', NEW.{_key}, 0);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{_table}_log_delete AFTER DELETE ON {_table} BEGIN
+            INSERT OR REPLACE INTO change_log (table_name, row_id, deleted) VALUES ('{_table}', OLD.{_key}, 1);
+        END""",
+    ]
+
+# Schema changes layered on top of the base tables in init_db(). The number of
+# applied entries is stored in PRAGMA user_version, so only ever append here.
+SCHEMA_MIGRATIONS = [
+    # 1: secondary indexes for foreign-key and filter columns
+    [
+        "CREATE INDEX IF NOT EXISTS idx_inventory_assigned_job ON inventory (assigned_job_id)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_client ON jobs (client_account_id)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_crew ON jobs (crew_id)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_scheduled_date ON jobs (scheduled_date)",
+        "CREATE INDEX IF NOT EXISTS idx_estimate_materials_estimate ON estimate_materials (estimate_id)",
+        "CREATE INDEX IF NOT EXISTS idx_crew_members_crew_employee ON crew_members (crew_id, employee_id)",
+        "CREATE INDEX IF NOT EXISTS idx_crew_members_employee ON crew_members (employee_id)",
+        "CREATE INDEX IF NOT EXISTS idx_materials_type_vendor ON materials (type_id, vendor_id)",
+        "CREATE INDEX IF NOT EXISTS idx_materials_vendor ON materials (vendor_id)",
+        "CREATE INDEX IF NOT EXISTS idx_estimates_client_status ON estimates (client_id, status)",
+    ],
+    # 2: full keyset-pagination sort keys (see LIST_ORDER)
+    [
+        "DROP INDEX IF EXISTS idx_jobs_scheduled_date",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_schedule_key ON jobs (scheduled_date, job_id)",
+        "CREATE INDEX IF NOT EXISTS idx_vendors_name_key ON vendors (name, vendor_id)",
+        "CREATE INDEX IF NOT EXISTS idx_employees_name_key ON employees (name, employee_id)",
+    ],
+    # 3: trigger-maintained report aggregates
+    AGGREGATE_TABLES + AGGREGATE_TRIGGERS + AGGREGATE_REBUILD,
+    # 4: change_log for delta sync
+    CHANGE_LOG_SCHEMA,
+    # 5: per-table latest version lookups for ETags
+    ["CREATE INDEX IF NOT EXISTS idx_change_log_table_version ON change_log (table_name, version)"],
+    # 6: state shared between worker processes
+    [
+        """CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pid INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_notifications_created ON notifications (created_at)",
+        """CREATE TABLE IF NOT EXISTS import_jobs (
+            job_id TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )""",
+    ],
+]
+
+def migrate_schema(conn):
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    # Table rebuilds drop a parent table that other tables reference, so
+    # foreign keys are off while migrating (the pragma can't change inside a
+    # transaction). Rebuilds keep every key, so no reference is left dangling.
+    conn.execute("PRAGMA foreign_keys = off")
+    try:
+        for number, statements in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+            conn.execute("BEGIN")
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute(f"PRAGMA foreign_keys = {DB_PRAGMAS['foreign_keys']}")
+    if version < len(SCHEMA_MIGRATIONS):
+        conn.execute("ANALYZE")
+        conn.commit()
+
+def rebuild_aggregates():
+    with get_db() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for statement in AGGREGATE_REBUILD:
+            conn.execute(statement)
+        conn.commit()
+
+def read_db_settings():
+    with get_db() as conn:
+        return {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in DB_PRAGMAS}
+
+def check_db_settings():
+    """Log the PRAGMA values actually in effect and warn if WAL was refused."""
+    settings = read_db_settings()
+    logger.info("SQLite settings: %s", ", ".join(f"{name}={value}" for name, value in settings.items()))
+    if str(settings["journal_mode"]).lower() != DB_PRAGMAS["journal_mode"].lower():
+        logger.warning("journal_mode is %s, expected %s", settings["journal_mode"], DB_PRAGMAS["journal_mode"])
+    return settings
 
 def init_db():
     with get_db() as conn:
@@ -163,6 +781,7 @@ def init_db():
             )
         """)
         conn.commit()
+        migrate_schema(conn)
 
 # Pydantic models
 class ClientCreate(BaseModel):
@@ -199,6 +818,11 @@ class InventoryItem(BaseModel):
     cost_markup: float
     assigned_job_id: Optional[str] = None
 
+class InventoryOperation(BaseModel):
+    op: str
+    item_id: Optional[int] = None
+    item: Optional[InventoryItem] = None
+
 class EstimateMaterialCreate(BaseModel):
     description: str
     quantity: float = 1
@@ -307,8 +931,626 @@ class WorkCrewSimple(BaseModel):
     name: str
     status: str
 
+def field_coercions(model):
+    """Map each int/float field of `model` (Optional or not) to its type.
+
+    Rows returned without a response model are cast with these, so they
+    match what validation would produce even where an older database
+    stores a key as TEXT (clients.account_id).
+    """
+    coercions = {}
+    for name, field in model.model_fields.items():
+        kinds = [kind for kind in (get_args(field.annotation) or (field.annotation,)) if kind is not type(None)]
+        if len(kinds) == 1 and kinds[0] in (int, float):
+            coercions[name] = kinds[0]
+    return coercions
+
+def coerce_rows(rows, coercions):
+    for row in rows:
+        for name, kind in coercions.items():
+            value = row.get(name)
+            if value is not None and type(value) is not kind:
+                row[name] = kind(value)
+    return rows
+
+@app.exception_handler(sqlite3.IntegrityError)
+def integrity_error_handler(request, exc):
+    # With foreign_keys=ON SQLite rejects orphaning deletes and dangling references.
+    # Handlers map the failures they expect; SQLite's own text stays in the log
+    logger.warning("Constraint violation on %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(status_code=400, content={"detail": "Constraint violation"})
+
+def missing_parent(cursor, exc, parents):
+    """Name the missing row behind a FOREIGN KEY failure.
+
+    Writes let SQLite enforce references instead of probing for the parent
+    first; only when one fails is each (table, key column, value, detail) in
+    `parents` checked. Returns the 400 for the first missing one, or None.
+    """
+    if "FOREIGN KEY" not in str(exc):
+        return None
+    for table, column, value, detail in parents:
+        if value is not None and not cursor.execute(f"SELECT 1 FROM {table} WHERE {column} = ?", (value,)).fetchone():
+            return HTTPException(status_code=400, detail=detail)
+    return None
+
+def insert_rows(cursor, sql, rows):
+    """executemany() the INSERT `sql` and return the new rows' ids, in order.
+
+    The ids are worked back from last_insert_rowid(), which holds because
+    every table this is used on is AUTOINCREMENT (each id is one more than
+    the largest ever issued) and the statement runs inside one write
+    transaction, so no other connection can insert between its rows. Don't
+    use it for INSERT OR IGNORE/REPLACE, which can skip rows.
+    """
+    rows = list(rows)
+    cursor.executemany(sql, rows)
+    if not rows:
+        return []
+    last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+# Keyset pagination. Each list walks its table in a fixed order whose last
+# column is unique, so a page resumes exactly after the row the cursor names.
+LIST_ORDER = {
+    "clients": (("account_id",), False),
+    "jobs": (("scheduled_date", "job_id"), True),
+    "inventory": (("item_id",), False),
+    "estimates": (("estimate_id",), True),
+    "materials": (("material_id",), False),
+    "vendors": (("name", "vendor_id"), False),
+    "employees": (("name", "employee_id"), False),
+}
+LIST_MAX_LIMIT = 1000
+
+# Columns a list may be sorted by with ?sort=<column> or ?sort=-<column>. Only
+# NOT NULL columns qualify, since NULLs would break the keyset comparison;
+# the table's unique key is always appended as a tie-breaker.
+LIST_SORTABLE = {
+    "clients": {"account_id", "name", "status"},
+    "jobs": {"scheduled_date", "job_id", "client_account_id", "cost_estimate", "address"},
+    "inventory": {"item_id", "type", "quantity", "cost"},
+    "estimates": {"estimate_id", "client_id", "status", "date_created", "date_updated"},
+    "materials": {"material_id", "type_id"},
+    "vendors": {"vendor_id", "name", "status"},
+    "employees": {"employee_id", "name", "status"},
+}
+
+# Whitelisted list filters: query parameter -> SQL predicate. A predicate
+# without a placeholder is a flag that applies when the parameter is true.
+LIST_FILTERS = {
+    "clients": {"status": "status = ?"},
+    "jobs": {
+        "status": "status = ?",
+        "client_id": "client_account_id = ?",
+        "crew_id": "crew_id = ?",
+        "date_from": "scheduled_date >= ?",
+        "date_to": "scheduled_date <= ?",
+    },
+    "inventory": {
+        "type": "type = ?",
+        "job_id": "assigned_job_id = ?",
+        "unassigned": "assigned_job_id IS NULL",
+    },
+    "estimates": {
+        "status": "status = ?",
+        "client_id": "client_id = ?",
+        "date_from": "scheduled_date >= ?",
+        "date_to": "scheduled_date <= ?",
+    },
+    "materials": {
+        "type_id": "type_id = ?",
+        "vendor_id": "vendor_id = ?",
+        "low_stock": "units_held <= reorder_threshold",
+    },
+    "vendors": {"status": "status = ?"},
+    "employees": {"status": "status = ?", "role": "role = ?"},
+}
+
+LIST_MODELS = {
+    "clients": Client, "jobs": Job, "inventory": InventoryItem, "estimates": Estimate,
+    "materials": Material, "vendors": Vendor, "employees": Employee,
+}
+
+# Columns each list selects, in response-model field order. Rows are fetched
+# as plain tuples and zipped against these, skipping sqlite3.Row.
+LIST_FIELDS = {
+    table: tuple(name for name in model.model_fields if name != "materials") for table, model in LIST_MODELS.items()
+}
+
+# With FAST_JSON_RESPONSES on, list endpoints encode the rows straight to JSON
+# (orjson when installed) instead of re-validating every row against the
+# response model. The numeric casts validation would apply are done with
+# LIST_COERCIONS instead, so the output is the same.
+LIST_COERCIONS = {table: field_coercions(model) for table, model in LIST_MODELS.items()}
+FAST_JSON_RESPONSES = os.environ.get("FAST_JSON_RESPONSES", "").lower() in ("1", "true", "yes", "on")
+
+def dump_json(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+def list_response(response, rows, table):
+    """Return `table` rows as is, or cast and pre-encoded when FAST_JSON_RESPONSES is on."""
+    if not FAST_JSON_RESPONSES:
+        return rows
+    coerce_rows(rows, LIST_COERCIONS[table])
+    headers = {"X-Next-Cursor": response.headers["X-Next-Cursor"]} if "X-Next-Cursor" in response.headers else None
+    return Response(dump_json(rows), media_type="application/json", headers=headers)
+
+def encode_cursor(sort, values):
+    return base64.urlsafe_b64encode(json.dumps({"sort": sort, "key": values}).encode()).decode()
+
+def decode_cursor(token, sort, size):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except ValueError:
+        payload = None
+    if (not isinstance(payload, dict) or payload.get("sort") != sort
+            or not isinstance(payload.get("key"), list) or len(payload["key"]) != size):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload["key"]
+
+def resolve_sort(table, sort):
+    columns, descending = LIST_ORDER[table]
+    if sort is None:
+        return columns, descending
+    column = sort[1:] if sort.startswith("-") else sort
+    if column not in LIST_SORTABLE[table]:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {column}")
+    if column == columns[-1]:
+        return (column,), sort.startswith("-")
+    return (column, columns[-1]), sort.startswith("-")
+
+def build_list_query(table, sort=None, after=None, limit=None, filters=None, select="*"):
+    """Compile list parameters into (sql, params, sort columns) for `table`."""
+    columns, descending = resolve_sort(table, sort)
+    where = []
+    params = []
+    for name, value in (filters or {}).items():
+        if value is None or value is False:
+            continue
+        predicate = LIST_FILTERS[table][name]
+        where.append(predicate)
+        if "?" in predicate:
+            params.append(value)
+    if after is not None:
+        where.append(f"({', '.join(columns)}) {'<' if descending else '>'} ({', '.join('?' * len(columns))})")
+        params.extend(decode_cursor(after, sort, len(columns)))
+    sql = f"SELECT {select} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY " + ", ".join(f"{column} DESC" if descending else column for column in columns)
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params, columns
+
+def fetch_page(cursor, response, table, limit=None, after=None, sort=None, **filters):
+    """Return one page of `table`; sets X-Next-Cursor when more rows follow."""
+    fields = LIST_FIELDS[table]
+    sql, params, columns = build_list_query(table, sort, after, None if limit is None else limit + 1, filters,
+                                            ", ".join(fields))
+    page = cursor.connection.cursor()
+    page.row_factory = None
+    page.execute(sql, params)
+    rows = [dict(zip(fields, row)) for row in page.fetchall()]
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(sort, [rows[-1][column] for column in columns])
+    return rows
+
+# Streaming exports: GET /<resource>/export?format=ndjson|csv walks the whole
+# (optionally filtered) table one keyset page of EXPORT_CHUNK_SIZE rows at a
+# time, so memory stays flat however large the table is, and a connection is
+# only checked out while a page is read, never while a slow client catches
+# up. Registered ahead of the /<resource>/{id} routes.
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_CHUNK_SIZE = 500
+
+def stream_export(table, fmt, sort, filters):
+    buffer = io.StringIO()
+    out = csv.writer(buffer)
+    after = None
+    while True:
+        sql, params, key = build_list_query(table, sort, after, EXPORT_CHUNK_SIZE, filters)
+        with get_db() as conn:
+            cursor = conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        if fmt == "csv" and after is None:
+            out.writerow(columns)
+        if fmt == "csv":
+            out.writerows(rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(dict(zip(columns, row))))
+                buffer.write("\n")
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if len(rows) < EXPORT_CHUNK_SIZE:
+            break
+        after = encode_cursor(sort, [rows[-1][column] for column in key])
+
+async def export_chunks(chunks):
+    """Iterate the stream_export() generator on the export executor, one chunk per step."""
+    context = contextvars.copy_context()
+    step = None
+    try:
+        while True:
+            step = db_executors["export"].submit(context.run, next, chunks, None)
+            db_executor_pending["export"] += 1
+            try:
+                chunk = await asyncio.wrap_future(step)
+            finally:
+                db_executor_pending["export"] -= 1
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        # A chunk may still be being read (the client went away mid-step);
+        # close the generator after it instead of racing it
+        if step is None:
+            chunks.close()
+        else:
+            step.add_done_callback(lambda _: chunks.close())
+
+def export_endpoint(table):
+    async def export(request: Request, fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+               sort: Optional[str] = None):
+        filters = {}
+        for name, predicate in LIST_FILTERS[table].items():
+            value = request.query_params.get(name)
+            if value is not None and "?" not in predicate:
+                value = value.lower() in ("1", "true", "yes", "on")
+            filters[name] = value
+        resolve_sort(table, sort)
+        return StreamingResponse(
+            export_chunks(stream_export(table, fmt, sort, filters)),
+            media_type=EXPORT_FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{table}.{fmt}"'},
+        )
+    export.__name__ = f"export_{table}"
+    return export
+
+for _table in LIST_ORDER:
+    app.add_api_route(f"/{_table}/export", export_endpoint(_table), methods=["GET"])
+
+# Catalog imports: POST /<resource>/import?format=csv|xlsx takes the file as
+# the raw request body, spools it to disk and returns 202 with a job id.
+# A background thread parses it row by row, resolves names to ids through
+# maps loaded once, and upserts IMPORT_BATCH_SIZE rows per write (one
+# writer job each, so other writes interleave between batches);
+# GET /<resource>/import/{job_id} reports progress and row errors.
+# Rows match existing ones by vendor name, or by (type, vendor, description)
+# for materials; blank cells leave the stored value unchanged.
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 100
+IMPORT_JOBS_KEPT = 50
+import_jobs = OrderedDict()
+import_jobs_lock = threading.Lock()
+
+VENDOR_IMPORT_COLUMNS = ("name", "status", "notes", "contact_name", "phone", "email", "address")
+MATERIAL_IMPORT_COLUMNS = ("type_id", "vendor_id", "description", "price_paid_per_unit", "units_held",
+                           "client_price_per_unit", "reorder_threshold")
+
+def import_text(row, column):
+    value = row.get(column)
+    if value is None or str(value).strip() == "":
+        return None
+    return str(value).strip()
+
+def import_number(row, column):
+    value = import_text(row, column)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a number")
+
+def import_reference(row, column, names, ids):
+    """Resolve a `vendor`/`type` name column (or its `_id` column) to an id."""
+    name = import_text(row, column)
+    if name is not None:
+        if name.lower() not in names:
+            raise ValueError(f"Unknown {column}: {name}")
+        return names[name.lower()]
+    value = import_number(row, f"{column}_id")
+    if value is not None and int(value) not in ids:
+        raise ValueError(f"Unknown {column}_id: {int(value)}")
+    return None if value is None else int(value)
+
+def load_vendor_import(cursor):
+    cursor.execute("SELECT vendor_id, name FROM vendors ORDER BY vendor_id DESC")
+    return {row[1].lower(): row[0] for row in cursor.fetchall()}, None
+
+def parse_vendor_row(row, refs):
+    name = import_text(row, "name")
+    if name is None:
+        raise ValueError("name is required")
+    values = (name,) + tuple(import_text(row, column) for column in VENDOR_IMPORT_COLUMNS[1:])
+    return name.lower(), values
+
+def load_material_import(cursor):
+    cursor.execute("SELECT type_id, name FROM material_types")
+    types = {row[1].lower(): row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT vendor_id, name FROM vendors ORDER BY vendor_id DESC")
+    vendors = {row[1].lower(): row[0] for row in cursor.fetchall()}
+    cursor.execute("SELECT material_id, type_id, vendor_id, description FROM materials")
+    keys = {(row[1], row[2], row[3]): row[0] for row in cursor.fetchall()}
+    return keys, (types, set(types.values()), vendors, set(vendors.values()))
+
+def parse_material_row(row, refs):
+    types, type_ids, vendors, vendor_ids = refs
+    type_id = import_reference(row, "type", types, type_ids)
+    if type_id is None:
+        raise ValueError("type is required")
+    vendor_id = import_reference(row, "vendor", vendors, vendor_ids)
+    description = import_text(row, "description")
+    values = (type_id, vendor_id, description) + tuple(import_number(row, column) for column in MATERIAL_IMPORT_COLUMNS[3:])
+    return (type_id, vendor_id, description), values
+
+# table -> (columns, defaults for new rows, loader, row parser)
+IMPORT_TABLES = {
+    "vendors": (VENDOR_IMPORT_COLUMNS, {"status": "active"}, load_vendor_import, parse_vendor_row),
+    "materials": (MATERIAL_IMPORT_COLUMNS, {"price_paid_per_unit": 0, "units_held": 0, "client_price_per_unit": 0,
+                                            "reorder_threshold": 0}, load_material_import, parse_material_row),
+}
+
+def read_import_rows(fmt, upload):
+    """Yield (line number, {header: value}) for each non-blank data row."""
+    if fmt == "xlsx":
+        workbook = openpyxl.load_workbook(upload, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        workbook = None
+        rows = csv.reader(io.TextIOWrapper(upload, encoding="utf-8-sig", newline=""))
+    try:
+        header = [str(value or "").strip().lower() for value in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, "") for value in values):
+                yield line, dict(zip(header, values))
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+def save_import_job(conn, job):
+    """Store the job's current state so every worker process can report it."""
+    conn.execute("INSERT OR REPLACE INTO import_jobs (job_id, state, updated_at) VALUES (?, ?, ?)",
+                 (job["job_id"], json.dumps(import_snapshot(job)), time.time()))
+
+def store_import_job(job):
+    with get_db() as conn:
+        save_import_job(conn, job)
+        if job["finished_at"]:
+            conn.execute("DELETE FROM import_jobs WHERE job_id NOT IN "
+                         "(SELECT job_id FROM import_jobs ORDER BY updated_at DESC LIMIT ?)", (IMPORT_JOBS_KEPT,))
+        conn.commit()
+
+def update_import_job(job, **changes):
+    with import_jobs_lock:
+        job.update(changes)
+    write_now(store_import_job, job)
+
+def write_import_batch(job, table, statements, keys, rows, inserts, updates, errors):
+    """Apply one parsed batch of `rows` import rows and record the job's progress."""
+    insert_sql, update_sql = statements
+    with get_db() as conn:
+        cursor = conn.cursor()
+        keys.update(zip(inserts, insert_rows(cursor, insert_sql, inserts.values())))
+        cursor.executemany(update_sql, updates)
+        with import_jobs_lock:
+            job["rows"] += rows
+            job["inserted"] += len(inserts)
+            job["updated"] += len(updates)
+            job["failed"] += len(errors)
+            job["errors"].extend(errors[:IMPORT_MAX_ERRORS - len(job["errors"])])
+        save_import_job(conn, job)
+        if table in reference_cache.tables:
+            reference_cache.invalidate(table)
+        conn.commit()
+    if table in EVENT_TABLES:
+        # Too many rows to announce one by one: tell subscribers to refetch the table
+        publish_change(table, "invalidate", None)
+
+def run_import(job, table, fmt, upload):
+    columns, defaults, load, parse = IMPORT_TABLES[table]
+    key_column = SYNC_TABLES[table]
+    insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    update_sql = (f"UPDATE {table} SET {', '.join(f'{c} = COALESCE(?, {c})' for c in columns)} "
+                  f"WHERE {key_column} = ?")
+    update_import_job(job, status="running")
+    try:
+        with get_db() as conn:
+            keys, refs = load(conn.cursor())
+        rows = read_import_rows(fmt, upload)
+        while True:
+            batch = [next(rows, None) for _ in range(IMPORT_BATCH_SIZE)]
+            batch = [entry for entry in batch if entry is not None]
+            if not batch:
+                break
+            inserts, updates, errors = {}, [], []
+            for line, row in batch:
+                try:
+                    key, values = parse(row, refs)
+                except ValueError as exc:
+                    errors.append({"row": line, "error": str(exc)})
+                    continue
+                if key in keys:
+                    updates.append(values + (keys[key],))
+                else:
+                    inserts[key] = tuple(defaults.get(c) if v is None else v for c, v in zip(columns, values))
+            write_now(write_import_batch, job, table, (insert_sql, update_sql), keys, len(batch),
+                      inserts, updates, errors)
+        update_import_job(job, status="completed", finished_at=datetime.now().isoformat())
+    except Exception as exc:
+        logger.exception("Import %s into %s failed", job["job_id"], table)
+        update_import_job(job, status="failed", error=str(exc), finished_at=datetime.now().isoformat())
+    finally:
+        upload.close()
+
+def import_snapshot(job):
+    with import_jobs_lock:
+        return dict(job, errors=list(job["errors"]))
+
+def import_endpoints(table):
+    async def start_import(request: Request, fmt: Optional[str] = Query(None, alias="format", pattern="^(csv|xlsx)$")):
+        if fmt is None:
+            fmt = "xlsx" if "spreadsheetml" in request.headers.get("content-type", "") else "csv"
+        if fmt == "xlsx" and openpyxl is None:
+            raise HTTPException(status_code=400, detail="XLSX import requires the openpyxl package")
+        upload = tempfile.TemporaryFile()
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        job = {"job_id": uuid.uuid4().hex, "table": table, "format": fmt, "status": "queued", "rows": 0,
+               "inserted": 0, "updated": 0, "failed": 0, "errors": [], "error": None,
+               "created_at": datetime.now().isoformat(), "finished_at": None}
+        with import_jobs_lock:
+            import_jobs[job["job_id"]] = job
+            while len(import_jobs) > IMPORT_JOBS_KEPT:
+                import_jobs.popitem(last=False)
+        await submit_write(store_import_job, job)
+        threading.Thread(target=run_import, args=(job, table, fmt, upload), daemon=True).start()
+        return import_snapshot(job)
+
+    @db_task("read")
+    def get_import(job_id: str):
+        job = import_jobs.get(job_id)
+        if job is not None:
+            job = import_snapshot(job)
+        else:
+            # Started by another worker process
+            with get_db() as conn:
+                row = conn.execute("SELECT state FROM import_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            job = json.loads(row[0]) if row else None
+        if job is None or job["table"] != table:
+            raise HTTPException(status_code=404, detail="Import not found")
+        return job
+
+    start_import.__name__ = f"import_{table}"
+    get_import.__name__ = f"get_{table}_import"
+    return start_import, get_import
+
+for _table in IMPORT_TABLES:
+    _start, _status = import_endpoints(_table)
+    app.add_api_route(f"/{_table}/import", _start, methods=["POST"], status_code=202)
+    app.add_api_route(f"/{_table}/import/{{job_id}}", _status, methods=["GET"])
+
+# Reference data cache. material_types, vendors, employees and work_crews are
+# small and rarely change, so their full lists (and the id sets behind the
+# foreign-key checks) are served from memory. Write handlers invalidate the
+# tables they touch once they commit, and other workers hear about it through
+# the notifier. Entries remember the change_log versions they were read at:
+# the ETag middleware, which reads those versions anyway, drops an entry that
+# has fallen behind, so a list is never served under a newer ETag. Entries
+# also expire after REFERENCE_CACHE_TTL seconds as a safety net.
+REFERENCE_CACHE_TTL = float(os.environ.get("REFERENCE_CACHE_TTL", "60"))
+
+def load_reference_rows(table):
+    def load(cursor):
+        sql, params, _ = build_list_query(table)
+        cursor.execute(sql, params)
+        return [dict(row) for row in cursor.fetchall()]
+    return load
+
+def load_material_types(cursor):
+    cursor.execute("SELECT * FROM material_types ORDER BY name")
+    return [dict(row) for row in cursor.fetchall()]
+
+class ReferenceCache:
+    """Versioned in-memory copies of whole tables.
+
+    invalidate() bumps a table's version, so a load that raced with a write
+    is never stored as current. A shared (batch or writer) connection can
+    see its own uncommitted writes, so tables it has written bypass the cache.
+    """
+
+    def __init__(self, tables, ttl):
+        self.tables = tables
+        self.ttl = ttl
+        self._entries = {}
+        self._versions = dict.fromkeys(tables, 0)
+        self._stats = {table: {"hits": 0, "misses": 0, "invalidations": 0} for table in tables}
+        self._lock = threading.Lock()
+
+    def _get(self, table):
+        key, sources, load = self.tables[table]
+        shared = batch_connection.get()
+        dirty = shared is not None and table in shared.dirty
+        with self._lock:
+            version = self._versions[table]
+            entry = self._entries.get(table)
+            if not dirty and entry and time.monotonic() - entry[1] < self.ttl:
+                self._stats[table]["hits"] += 1
+                return entry[3], entry[4]
+            self._stats[table]["misses"] += 1
+        with get_db() as conn:
+            snapshot = not conn.in_transaction
+            if snapshot:
+                conn.execute("BEGIN")
+            try:
+                read_at = dict(zip(sources, read_versions(conn, sources)))
+                rows = load(conn.cursor())
+            finally:
+                if snapshot:
+                    conn.rollback()
+        ids = {row[key] for row in rows}
+        if not dirty:
+            with self._lock:
+                if self._versions[table] == version:
+                    self._entries[table] = (version, time.monotonic(), read_at, rows, ids)
+        return rows, ids
+
+    def rows(self, table):
+        return self._get(table)[0]
+
+    def exists(self, table, row_id):
+        return row_id in self._get(table)[1]
+
+    def invalidate(self, *tables):
+        """Drop `tables` (default all) once the current write commits."""
+        tables = tables or tuple(self.tables)
+        shared = batch_connection.get()
+        if shared is not None:
+            shared.dirty.update(tables)
+        on_commit(functools.partial(self.invalidate_now, tables, broadcast=True))
+
+    def invalidate_now(self, tables, broadcast=False):
+        with self._lock:
+            for table in tables:
+                self._versions[table] += 1
+                self._entries.pop(table, None)
+                self._stats[table]["invalidations"] += 1
+        if broadcast:
+            notifier.send("invalidate", list(tables))
+
+    def check_versions(self, versions):
+        """Drop entries read before the change_log `versions` ({table: version})."""
+        with self._lock:
+            stale = [table for table, entry in self._entries.items()
+                     if any(versions.get(source, version) != version for source, version in entry[2].items())]
+        if stale:
+            self.invalidate_now(stale)
+
+    def stats(self):
+        with self._lock:
+            return {"ttl": self.ttl, "tables": {table: dict(stats) for table, stats in self._stats.items()}}
+
+# table -> (key column, tables it is read from, loader)
+reference_cache = ReferenceCache({
+    "material_types": ("type_id", ("material_types",), load_material_types),
+    "vendors": ("vendor_id", ("vendors",), load_reference_rows("vendors")),
+    "employees": ("employee_id", ("employees",), load_reference_rows("employees")),
+    "work_crews": ("crew_id", ("work_crews", "crew_members", "employees"), lambda cursor: load_work_crews(cursor)),
+}, REFERENCE_CACHE_TTL)
+
 # Client endpoints
 @app.post("/clients", response_model=Client)
+@db_task("write")
 def create_client(client: ClientCreate):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -323,13 +1565,16 @@ def create_client(client: ClientCreate):
         return dict(row)
 
 @app.get("/clients", response_model=List[Client])
-def get_clients():
+@db_task("read")
+def get_clients(response: Response, limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT), after: Optional[str] = None,
+                sort: Optional[str] = None, status: Optional[str] = None):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM clients")
-        return [dict(row) for row in cursor.fetchall()]
+        rows = fetch_page(cursor, response, "clients", limit, after, sort, status=status)
+        return list_response(response, rows, "clients")
 
 @app.get("/clients/{account_id}")
+@db_task("read")
 def get_client(account_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -340,16 +1585,21 @@ def get_client(account_id: int):
         return dict(row)
 
 @app.delete("/clients/{account_id}")
+@db_task("write")
 def delete_client(account_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM clients WHERE account_id = ?", (account_id,))
+        try:
+            cursor.execute("DELETE FROM clients WHERE account_id = ?", (account_id,))
+        except sqlite3.IntegrityError:
+            raise HTTPException(status_code=400, detail="Client has jobs or estimates; delete those first")
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Client not found")
         conn.commit()
     return {"message": "Client deleted"}
 
 @app.put("/clients/{account_id}")
+@db_task("write")
 def update_client(account_id: int, client: ClientCreate):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -366,36 +1616,41 @@ def update_client(account_id: int, client: ClientCreate):
 
 # Job endpoints
 @app.post("/jobs")
+@db_task("write")
 def create_job(job: Job):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM clients WHERE account_id = ?", (job.client_account_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Client not found")
-        
-        if job.crew_id:
-            cursor.execute("SELECT * FROM work_crews WHERE crew_id = ?", (job.crew_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=400, detail="Work crew not found")
+        if job.crew_id and not reference_cache.exists("work_crews", job.crew_id):
+            raise HTTPException(status_code=400, detail="Work crew not found")
         
         try:
             cursor.execute(
-                "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?)",
-                (job.job_id, job.client_account_id, job.crew_id, job.address, job.scheduled_date, job.cost_estimate)
+                """INSERT INTO jobs (job_id, client_account_id, crew_id, address, scheduled_date, cost_estimate, status)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (job.job_id, job.client_account_id, job.crew_id, job.address, job.scheduled_date, job.cost_estimate,
+                 job.status)
             )
             conn.commit()
-        except sqlite3.IntegrityError:
-            raise HTTPException(status_code=400, detail="Job already exists")
+        except sqlite3.IntegrityError as exc:
+            raise (missing_parent(cursor, exc, [("clients", "account_id", job.client_account_id, "Client not found"),
+                                                ("work_crews", "crew_id", job.crew_id, "Work crew not found")])
+                   or HTTPException(status_code=400, detail="Job already exists"))
+    publish_change("jobs", "create", job.job_id)
     return job
 
 @app.get("/jobs", response_model=List[Job])
-def get_jobs():
+@db_task("read")
+def get_jobs(response: Response, limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT), after: Optional[str] = None,
+             sort: Optional[str] = None, status: Optional[str] = None, client_id: Optional[int] = None, crew_id: Optional[int] = None,
+             date_from: Optional[str] = None, date_to: Optional[str] = None):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM jobs ORDER BY scheduled_date DESC")
-        return [dict(row) for row in cursor.fetchall()]
+        rows = fetch_page(cursor, response, "jobs", limit, after, sort, status=status, client_id=client_id,
+                          crew_id=crew_id, date_from=date_from, date_to=date_to)
+        return list_response(response, rows, "jobs")
 
 @app.get("/jobs/{job_id}")
+@db_task("read")
 def get_job(job_id: str):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -406,6 +1661,7 @@ def get_job(job_id: str):
         return dict(row)
 
 @app.get("/jobs/client/{client_account_id}")
+@db_task("read")
 def get_client_jobs(client_account_id: str):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -413,29 +1669,30 @@ def get_client_jobs(client_account_id: str):
         return [dict(row) for row in cursor.fetchall()]
 
 @app.delete("/jobs/{job_id}")
+@db_task("write")
 def delete_job(job_id: str):
     with get_db() as conn:
         cursor = conn.cursor()
         # Unassign inventory from this job first
-        cursor.execute("UPDATE inventory SET assigned_job_id = NULL WHERE assigned_job_id = ?", (job_id,))
+        unassigned = cursor.execute(
+            "UPDATE inventory SET assigned_job_id = NULL WHERE assigned_job_id = ? RETURNING item_id", (job_id,)
+        ).fetchall()
         cursor.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Job not found")
         conn.commit()
+        publish_change("jobs", "delete", job_id)
+        for row in unassigned:
+            publish_change("inventory", "update", row["item_id"])
     return {"message": "Job deleted"}
 
 @app.put("/jobs/{job_id}")
+@db_task("write")
 def update_job(job_id: str, job: Job):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM clients WHERE account_id = ?", (job.client_account_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Client not found")
-        
-        if job.crew_id:
-            cursor.execute("SELECT * FROM work_crews WHERE crew_id = ?", (job.crew_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=400, detail="Work crew not found")
+        if job.crew_id and not reference_cache.exists("work_crews", job.crew_id):
+            raise HTTPException(status_code=400, detail="Work crew not found")
         
         # Calculate actual total if provided
         actual_total = job.actual_total_cost
@@ -444,48 +1701,118 @@ def update_job(job_id: str, job: Job):
             materials_cost = job.actual_materials_cost or 0
             actual_total = hourly_cost + materials_cost
         
-        cursor.execute(
-            """UPDATE jobs SET client_account_id=?, crew_id=?, address=?, scheduled_date=?, 
-               cost_estimate=?, actual_hours=?, actual_hourly_rate=?, actual_materials_cost=?, 
-               actual_total_cost=?, status=? WHERE job_id=?""",
-            (job.client_account_id, job.crew_id, job.address, job.scheduled_date, job.cost_estimate,
-             job.actual_hours, job.actual_hourly_rate, job.actual_materials_cost, actual_total, 
-             job.status, job_id)
-        )
+        try:
+            cursor.execute(
+                """UPDATE jobs SET client_account_id=?, crew_id=?, address=?, scheduled_date=?, 
+                   cost_estimate=?, actual_hours=?, actual_hourly_rate=?, actual_materials_cost=?, 
+                   actual_total_cost=?, status=? WHERE job_id=?""",
+                (job.client_account_id, job.crew_id, job.address, job.scheduled_date, job.cost_estimate,
+                 job.actual_hours, job.actual_hourly_rate, job.actual_materials_cost, actual_total, 
+                 job.status, job_id)
+            )
+        except sqlite3.IntegrityError as exc:
+            raise missing_parent(cursor, exc, [("clients", "account_id", job.client_account_id, "Client not found"),
+                                               ("work_crews", "crew_id", job.crew_id, "Work crew not found")]) or exc
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Job not found")
         conn.commit()
+        publish_change("jobs", "update", job_id)
         cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
         return dict(cursor.fetchone())
 
 # Inventory endpoints
 @app.post("/inventory", response_model=InventoryItem)
+@db_task("write")
 def create_inventory(item: InventoryItem):
     with get_db() as conn:
         cursor = conn.cursor()
-        if item.assigned_job_id:
-            cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (item.assigned_job_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=400, detail="Job not found")
-        
-        cursor.execute(
-            "INSERT INTO inventory (type, quantity, cost, cost_markup, assigned_job_id) VALUES (?, ?, ?, ?, ?)",
-            (item.type, item.quantity, item.cost, item.cost_markup, item.assigned_job_id)
-        )
+        try:
+            cursor.execute(
+                "INSERT INTO inventory (type, quantity, cost, cost_markup, assigned_job_id) VALUES (?, ?, ?, ?, ?)",
+                (item.type, item.quantity, item.cost, item.cost_markup, item.assigned_job_id)
+            )
+        except sqlite3.IntegrityError as exc:
+            raise missing_parent(cursor, exc, [("jobs", "job_id", item.assigned_job_id, "Job not found")]) or exc
         item_id = cursor.lastrowid
         conn.commit()
+        publish_change("inventory", "create", item_id)
         
         cursor.execute("SELECT * FROM inventory WHERE item_id = ?", (item_id,))
         return dict(cursor.fetchone())
 
+INVENTORY_BULK_MAX = 1000
+
+@app.post("/inventory/bulk")
+@db_task("write")
+def bulk_inventory(operations: List[InventoryOperation]):
+    """Apply create/update/delete operations in one transaction, all or nothing."""
+    if len(operations) > INVENTORY_BULK_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {INVENTORY_BULK_MAX} operations per request")
+    with get_db() as conn:
+        cursor = conn.cursor()
+        job_ids = {op.item.assigned_job_id for op in operations if op.item and op.item.assigned_job_id}
+        item_ids = {op.item_id for op in operations if op.item_id is not None}
+        cursor.execute("SELECT job_id FROM jobs WHERE job_id IN (SELECT value FROM json_each(?))",
+                       (json.dumps(list(job_ids)),))
+        known_jobs = {row[0] for row in cursor.fetchall()}
+        cursor.execute("SELECT item_id FROM inventory WHERE item_id IN (SELECT value FROM json_each(?))",
+                       (json.dumps(list(item_ids)),))
+        known_items = {row[0] for row in cursor.fetchall()}
+
+        errors = []
+        for index, op in enumerate(operations):
+            if op.op not in ("create", "update", "delete"):
+                error = f"Unknown op: {op.op}"
+            elif op.op != "create" and op.item_id is None:
+                error = "item_id is required"
+            elif op.op != "create" and op.item_id not in known_items:
+                error = "Item not found"
+            elif op.op != "delete" and op.item is None:
+                error = "item is required"
+            elif op.op != "delete" and op.item.assigned_job_id and op.item.assigned_job_id not in known_jobs:
+                error = "Job not found"
+            else:
+                continue
+            errors.append({"index": index, "error": error})
+        if errors:
+            raise HTTPException(status_code=400, detail=errors)
+
+        created_ids = iter(insert_rows(
+            cursor,
+            "INSERT INTO inventory (type, quantity, cost, cost_markup, assigned_job_id) VALUES (?, ?, ?, ?, ?)",
+            [(op.item.type, op.item.quantity, op.item.cost, op.item.cost_markup, op.item.assigned_job_id)
+             for op in operations if op.op == "create"]
+        ))
+        cursor.executemany(
+            "UPDATE inventory SET type=?, quantity=?, cost=?, cost_markup=?, assigned_job_id=? WHERE item_id=?",
+            [(op.item.type, op.item.quantity, op.item.cost, op.item.cost_markup, op.item.assigned_job_id, op.item_id)
+             for op in operations if op.op == "update"]
+        )
+        cursor.executemany("DELETE FROM inventory WHERE item_id = ?",
+                           [(op.item_id,) for op in operations if op.op == "delete"])
+        conn.commit()
+
+    results = []
+    for index, op in enumerate(operations):
+        item_id = op.item_id
+        if op.op == "create":
+            item_id = next(created_ids)
+        publish_change("inventory", op.op, item_id)
+        results.append({"index": index, "op": op.op, "item_id": item_id})
+    return results
+
 @app.get("/inventory", response_model=List[InventoryItem])
-def get_inventory():
+@db_task("read")
+def get_inventory(response: Response, limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT), after: Optional[str] = None,
+                  sort: Optional[str] = None, type: Optional[str] = None, job_id: Optional[str] = None, unassigned: bool = False):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM inventory")
-        return [dict(row) for row in cursor.fetchall()]
+        rows = fetch_page(cursor, response, "inventory", limit, after, sort, type=type, job_id=job_id,
+                          unassigned=unassigned)
+        return list_response(response, rows, "inventory")
 
 @app.get("/inventory/{item_id}")
+@db_task("read")
 def get_inventory_item(item_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -496,6 +1823,7 @@ def get_inventory_item(item_id: int):
         return dict(row)
 
 @app.get("/inventory/job/{job_id}")
+@db_task("read")
 def get_job_inventory(job_id: str):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -503,24 +1831,26 @@ def get_job_inventory(job_id: str):
         return [dict(row) for row in cursor.fetchall()]
 
 @app.put("/inventory/{item_id}")
+@db_task("write")
 def update_inventory(item_id: int, item: InventoryItem):
     with get_db() as conn:
         cursor = conn.cursor()
-        if item.assigned_job_id:
-            cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (item.assigned_job_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=400, detail="Job not found")
-        cursor.execute(
-            "UPDATE inventory SET type=?, quantity=?, cost=?, cost_markup=?, assigned_job_id=? WHERE item_id=?",
-            (item.type, item.quantity, item.cost, item.cost_markup, item.assigned_job_id, item_id)
-        )
+        try:
+            cursor.execute(
+                "UPDATE inventory SET type=?, quantity=?, cost=?, cost_markup=?, assigned_job_id=? WHERE item_id=?",
+                (item.type, item.quantity, item.cost, item.cost_markup, item.assigned_job_id, item_id)
+            )
+        except sqlite3.IntegrityError as exc:
+            raise missing_parent(cursor, exc, [("jobs", "job_id", item.assigned_job_id, "Job not found")]) or exc
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Item not found")
         conn.commit()
+        publish_change("inventory", "update", item_id)
         cursor.execute("SELECT * FROM inventory WHERE item_id = ?", (item_id,))
         return dict(cursor.fetchone())
 
 @app.delete("/inventory/{item_id}")
+@db_task("write")
 def delete_inventory(item_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -528,30 +1858,46 @@ def delete_inventory(item_id: int):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Item not found")
         conn.commit()
+        publish_change("inventory", "delete", item_id)
     return {"message": "Item deleted"}
 
 # Estimate endpoints
+def attach_estimate_materials(cursor, estimates):
+    """Fill in 'materials' for every estimate dict using a single query."""
+    by_id = {}
+    for est in estimates:
+        est['materials'] = []
+        by_id[est['estimate_id']] = est
+    if by_id:
+        cursor.execute(
+            "SELECT * FROM estimate_materials WHERE estimate_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(by_id)),)
+        )
+        for m in cursor.fetchall():
+            by_id[m['estimate_id']]['materials'].append(dict(m))
+    return estimates
+
 @app.post("/estimates", response_model=Estimate)
+@db_task("write")
 def create_estimate(estimate: EstimateCreate):
     with get_db() as conn:
         cursor = conn.cursor()
-        # Verify client exists
-        cursor.execute("SELECT * FROM clients WHERE account_id = ?", (estimate.client_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Client not found")
-        
         now = datetime.now().isoformat()
         total_hourly = estimate.estimated_hours * estimate.estimated_hourly_rate
         
-        cursor.execute(
-            """INSERT INTO estimates (client_id, status, estimated_hours, estimated_hourly_rate, 
-               total_materials_cost, total_hourly_cost, total_estimate_cost, scheduled_date, date_created, date_updated)
-               VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?)""",
-            (estimate.client_id, estimate.status, estimate.estimated_hours, estimate.estimated_hourly_rate,
-             total_hourly, total_hourly, estimate.scheduled_date, now, now)
-        )
+        try:
+            cursor.execute(
+                """INSERT INTO estimates (client_id, status, estimated_hours, estimated_hourly_rate, 
+                   total_materials_cost, total_hourly_cost, total_estimate_cost, scheduled_date, date_created, date_updated)
+                   VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?)""",
+                (estimate.client_id, estimate.status, estimate.estimated_hours, estimate.estimated_hourly_rate,
+                 total_hourly, total_hourly, estimate.scheduled_date, now, now)
+            )
+        except sqlite3.IntegrityError as exc:
+            raise missing_parent(cursor, exc, [("clients", "account_id", estimate.client_id, "Client not found")]) or exc
         estimate_id = cursor.lastrowid
         conn.commit()
+        publish_change("estimates", "create", estimate_id)
         
         cursor.execute("SELECT * FROM estimates WHERE estimate_id = ?", (estimate_id,))
         row = cursor.fetchone()
@@ -560,19 +1906,18 @@ def create_estimate(estimate: EstimateCreate):
         return result
 
 @app.get("/estimates", response_model=List[Estimate])
-def get_estimates():
+@db_task("read")
+def get_estimates(response: Response, limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT), after: Optional[str] = None,
+                  sort: Optional[str] = None, status: Optional[str] = None, client_id: Optional[int] = None,
+                  date_from: Optional[str] = None, date_to: Optional[str] = None):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM estimates ORDER BY estimate_id DESC")
-        estimates = []
-        for row in cursor.fetchall():
-            est = dict(row)
-            cursor.execute("SELECT * FROM estimate_materials WHERE estimate_id = ?", (est['estimate_id'],))
-            est['materials'] = [dict(m) for m in cursor.fetchall()]
-            estimates.append(est)
-        return estimates
+        estimates = fetch_page(cursor, response, "estimates", limit, after, sort, status=status,
+                               client_id=client_id, date_from=date_from, date_to=date_to)
+        return list_response(response, attach_estimate_materials(cursor, estimates), "estimates")
 
 @app.get("/estimates/{estimate_id}")
+@db_task("read")
 def get_estimate(estimate_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -580,19 +1925,13 @@ def get_estimate(estimate_id: int):
         row = cursor.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Estimate not found")
-        est = dict(row)
-        cursor.execute("SELECT * FROM estimate_materials WHERE estimate_id = ?", (estimate_id,))
-        est['materials'] = [dict(m) for m in cursor.fetchall()]
-        return est
+        return attach_estimate_materials(cursor, [dict(row)])[0]
 
 @app.put("/estimates/{estimate_id}")
+@db_task("write")
 def update_estimate(estimate_id: int, estimate: EstimateCreate):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM clients WHERE account_id = ?", (estimate.client_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Client not found")
-        
         now = datetime.now().isoformat()
         total_hourly = estimate.estimated_hours * estimate.estimated_hourly_rate
         
@@ -602,25 +1941,27 @@ def update_estimate(estimate_id: int, estimate: EstimateCreate):
         total_materials = mat_result['mat_total'] if mat_result['mat_total'] else 0
         total_estimate = total_materials + total_hourly
         
-        cursor.execute(
-            """UPDATE estimates SET client_id=?, status=?, estimated_hours=?, estimated_hourly_rate=?,
-               total_materials_cost=?, total_hourly_cost=?, total_estimate_cost=?, scheduled_date=?, date_updated=?
-               WHERE estimate_id=?""",
-            (estimate.client_id, estimate.status, estimate.estimated_hours, estimate.estimated_hourly_rate,
-             total_materials, total_hourly, total_estimate, estimate.scheduled_date, now, estimate_id)
-        )
+        try:
+            cursor.execute(
+                """UPDATE estimates SET client_id=?, status=?, estimated_hours=?, estimated_hourly_rate=?,
+                   total_materials_cost=?, total_hourly_cost=?, total_estimate_cost=?, scheduled_date=?, date_updated=?
+                   WHERE estimate_id=?""",
+                (estimate.client_id, estimate.status, estimate.estimated_hours, estimate.estimated_hourly_rate,
+                 total_materials, total_hourly, total_estimate, estimate.scheduled_date, now, estimate_id)
+            )
+        except sqlite3.IntegrityError as exc:
+            raise missing_parent(cursor, exc, [("clients", "account_id", estimate.client_id, "Client not found")]) or exc
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Estimate not found")
         conn.commit()
+        publish_change("estimates", "update", estimate_id)
         
         cursor.execute("SELECT * FROM estimates WHERE estimate_id = ?", (estimate_id,))
         row = cursor.fetchone()
-        est = dict(row)
-        cursor.execute("SELECT * FROM estimate_materials WHERE estimate_id = ?", (estimate_id,))
-        est['materials'] = [dict(m) for m in cursor.fetchall()]
-        return est
+        return attach_estimate_materials(cursor, [dict(row)])[0]
 
 @app.delete("/estimates/{estimate_id}")
+@db_task("write")
 def delete_estimate(estimate_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -629,14 +1970,34 @@ def delete_estimate(estimate_id: int):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Estimate not found")
         conn.commit()
+        publish_change("estimates", "delete", estimate_id)
     return {"message": "Estimate deleted"}
 
 # Estimate Materials endpoints
+ESTIMATE_MATERIALS_BULK_MAX = 1000
+
+def recompute_estimate_totals(cursor, estimate_id):
+    """Refresh an estimate's material and overall totals from its line items."""
+    cursor.execute("SELECT SUM(total_cost) as mat_total FROM estimate_materials WHERE estimate_id = ?", (estimate_id,))
+    mat_result = cursor.fetchone()
+    total_materials = mat_result['mat_total'] if mat_result['mat_total'] else 0
+
+    cursor.execute("SELECT estimated_hours, estimated_hourly_rate FROM estimates WHERE estimate_id = ?", (estimate_id,))
+    est = cursor.fetchone()
+    total_hourly = (est['estimated_hours'] or 0) * (est['estimated_hourly_rate'] or 0)
+
+    now = datetime.now().isoformat()
+    cursor.execute(
+        "UPDATE estimates SET total_materials_cost=?, total_estimate_cost=?, date_updated=? WHERE estimate_id=?",
+        (total_materials, total_materials + total_hourly, now, estimate_id)
+    )
+
 @app.post("/estimates/{estimate_id}/materials")
+@db_task("write")
 def add_estimate_material(estimate_id: int, material: EstimateMaterialCreate):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM estimates WHERE estimate_id = ?", (estimate_id,))
+        cursor.execute("SELECT 1 FROM estimates WHERE estimate_id = ?", (estimate_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Estimate not found")
         
@@ -648,26 +2009,39 @@ def add_estimate_material(estimate_id: int, material: EstimateMaterialCreate):
         )
         material_id = cursor.lastrowid
         
-        # Update estimate totals
-        cursor.execute("SELECT SUM(total_cost) as mat_total FROM estimate_materials WHERE estimate_id = ?", (estimate_id,))
-        mat_result = cursor.fetchone()
-        total_materials = mat_result['mat_total'] if mat_result['mat_total'] else 0
-        
-        cursor.execute("SELECT estimated_hours, estimated_hourly_rate FROM estimates WHERE estimate_id = ?", (estimate_id,))
-        est = cursor.fetchone()
-        total_hourly = (est['estimated_hours'] or 0) * (est['estimated_hourly_rate'] or 0)
-        
-        now = datetime.now().isoformat()
-        cursor.execute(
-            "UPDATE estimates SET total_materials_cost=?, total_estimate_cost=?, date_updated=? WHERE estimate_id=?",
-            (total_materials, total_materials + total_hourly, now, estimate_id)
-        )
-        
+        recompute_estimate_totals(cursor, estimate_id)
         conn.commit()
+        publish_change("estimates", "update", estimate_id)
         cursor.execute("SELECT * FROM estimate_materials WHERE material_id = ?", (material_id,))
         return dict(cursor.fetchone())
 
+@app.post("/estimates/{estimate_id}/materials/bulk", response_model=List[EstimateMaterial])
+@db_task("write")
+def add_estimate_materials(estimate_id: int, materials: List[EstimateMaterialCreate]):
+    if len(materials) > ESTIMATE_MATERIALS_BULK_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {ESTIMATE_MATERIALS_BULK_MAX} line items per request")
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM estimates WHERE estimate_id = ?", (estimate_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Estimate not found")
+        if not materials:
+            return []
+
+        material_ids = insert_rows(
+            cursor,
+            "INSERT INTO estimate_materials (estimate_id, description, quantity, unit_cost, total_cost) VALUES (?, ?, ?, ?, ?)",
+            [(estimate_id, m.description, m.quantity, m.unit_cost, m.quantity * m.unit_cost) for m in materials]
+        )
+        recompute_estimate_totals(cursor, estimate_id)
+        conn.commit()
+        publish_change("estimates", "update", estimate_id)
+        cursor.execute("SELECT * FROM estimate_materials WHERE material_id BETWEEN ? AND ? ORDER BY material_id",
+                       (material_ids[0], material_ids[-1]))
+        return [dict(row) for row in cursor.fetchall()]
+
 @app.delete("/estimates/{estimate_id}/materials/{material_id}")
+@db_task("write")
 def delete_estimate_material(estimate_id: int, material_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -675,54 +2049,47 @@ def delete_estimate_material(estimate_id: int, material_id: int):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Material not found")
         
-        # Update estimate totals
-        cursor.execute("SELECT SUM(total_cost) as mat_total FROM estimate_materials WHERE estimate_id = ?", (estimate_id,))
-        mat_result = cursor.fetchone()
-        total_materials = mat_result['mat_total'] if mat_result['mat_total'] else 0
-        
-        cursor.execute("SELECT estimated_hours, estimated_hourly_rate FROM estimates WHERE estimate_id = ?", (estimate_id,))
-        est = cursor.fetchone()
-        total_hourly = (est['estimated_hours'] or 0) * (est['estimated_hourly_rate'] or 0)
-        
-        now = datetime.now().isoformat()
-        cursor.execute(
-            "UPDATE estimates SET total_materials_cost=?, total_estimate_cost=?, date_updated=? WHERE estimate_id=?",
-            (total_materials, total_materials + total_hourly, now, estimate_id)
-        )
-        
+        recompute_estimate_totals(cursor, estimate_id)
         conn.commit()
+        publish_change("estimates", "update", estimate_id)
     return {"message": "Material deleted"}
 
 # Material Types endpoints
 @app.post("/material-types", response_model=MaterialType)
+@db_task("write")
 def create_material_type(mt: MaterialTypeCreate):
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute("INSERT INTO material_types (name) VALUES (?)", (mt.name,))
         type_id = cursor.lastrowid
+        reference_cache.invalidate("material_types")
         conn.commit()
         cursor.execute("SELECT * FROM material_types WHERE type_id = ?", (type_id,))
         return dict(cursor.fetchone())
 
 @app.get("/material-types", response_model=List[MaterialType])
+@db_task("read")
 def get_material_types():
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM material_types ORDER BY name")
-        return [dict(row) for row in cursor.fetchall()]
+    return reference_cache.rows("material_types")
 
 @app.delete("/material-types/{type_id}")
+@db_task("write")
 def delete_material_type(type_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM material_types WHERE type_id = ?", (type_id,))
+        try:
+            cursor.execute("DELETE FROM material_types WHERE type_id = ?", (type_id,))
+        except sqlite3.IntegrityError:
+            raise HTTPException(status_code=400, detail="Material type is used by materials")
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Material type not found")
+        reference_cache.invalidate("material_types")
         conn.commit()
     return {"message": "Material type deleted"}
 
 # Vendor endpoints
 @app.post("/vendors", response_model=Vendor)
+@db_task("write")
 def create_vendor(vendor: VendorCreate):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -731,18 +2098,24 @@ def create_vendor(vendor: VendorCreate):
             (vendor.name, vendor.status, vendor.notes, vendor.contact_name, vendor.phone, vendor.email, vendor.address)
         )
         vendor_id = cursor.lastrowid
+        reference_cache.invalidate("vendors")
         conn.commit()
         cursor.execute("SELECT * FROM vendors WHERE vendor_id = ?", (vendor_id,))
         return dict(cursor.fetchone())
 
 @app.get("/vendors", response_model=List[Vendor])
-def get_vendors():
+@db_task("read")
+def get_vendors(response: Response, limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT), after: Optional[str] = None,
+                sort: Optional[str] = None, status: Optional[str] = None):
+    if limit is None and after is None and sort is None and status is None:
+        return list_response(response, reference_cache.rows("vendors"), "vendors")
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM vendors ORDER BY name")
-        return [dict(row) for row in cursor.fetchall()]
+        rows = fetch_page(cursor, response, "vendors", limit, after, sort, status=status)
+        return list_response(response, rows, "vendors")
 
 @app.get("/vendors/{vendor_id}")
+@db_task("read")
 def get_vendor(vendor_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -753,6 +2126,7 @@ def get_vendor(vendor_id: int):
         return dict(row)
 
 @app.put("/vendors/{vendor_id}")
+@db_task("write")
 def update_vendor(vendor_id: int, vendor: VendorCreate):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -762,32 +2136,39 @@ def update_vendor(vendor_id: int, vendor: VendorCreate):
         )
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Vendor not found")
+        reference_cache.invalidate("vendors")
         conn.commit()
         cursor.execute("SELECT * FROM vendors WHERE vendor_id = ?", (vendor_id,))
         return dict(cursor.fetchone())
 
 @app.delete("/vendors/{vendor_id}")
+@db_task("write")
 def delete_vendor(vendor_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
+        # Materials bought from this vendor keep their rows, without a vendor
+        orphaned = cursor.execute(
+            "UPDATE materials SET vendor_id = NULL WHERE vendor_id = ? RETURNING material_id", (vendor_id,)
+        ).fetchall()
         cursor.execute("DELETE FROM vendors WHERE vendor_id = ?", (vendor_id,))
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Vendor not found")
+        reference_cache.invalidate("vendors")
         conn.commit()
+        for row in orphaned:
+            publish_change("materials", "update", row["material_id"])
     return {"message": "Vendor deleted"}
 
 # Materials endpoints
 @app.post("/materials", response_model=Material)
+@db_task("write")
 def create_material(material: MaterialCreate):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM material_types WHERE type_id = ?", (material.type_id,))
-        if not cursor.fetchone():
+        if not reference_cache.exists("material_types", material.type_id):
             raise HTTPException(status_code=400, detail="Material type not found")
-        if material.vendor_id:
-            cursor.execute("SELECT * FROM vendors WHERE vendor_id = ?", (material.vendor_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=400, detail="Vendor not found")
+        if material.vendor_id and not reference_cache.exists("vendors", material.vendor_id):
+            raise HTTPException(status_code=400, detail="Vendor not found")
         
         cursor.execute(
             """INSERT INTO materials (type_id, vendor_id, price_paid_per_unit, units_held, 
@@ -798,17 +2179,22 @@ def create_material(material: MaterialCreate):
         )
         material_id = cursor.lastrowid
         conn.commit()
+        publish_change("materials", "create", material_id)
         cursor.execute("SELECT * FROM materials WHERE material_id = ?", (material_id,))
         return dict(cursor.fetchone())
 
 @app.get("/materials", response_model=List[Material])
-def get_materials():
+@db_task("read")
+def get_materials(response: Response, limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT), after: Optional[str] = None,
+                  sort: Optional[str] = None, type_id: Optional[int] = None, vendor_id: Optional[int] = None, low_stock: bool = False):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM materials ORDER BY material_id")
-        return [dict(row) for row in cursor.fetchall()]
+        rows = fetch_page(cursor, response, "materials", limit, after, sort, type_id=type_id, vendor_id=vendor_id,
+                          low_stock=low_stock)
+        return list_response(response, rows, "materials")
 
 @app.get("/materials/{material_id}")
+@db_task("read")
 def get_material(material_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -819,16 +2205,14 @@ def get_material(material_id: int):
         return dict(row)
 
 @app.put("/materials/{material_id}")
+@db_task("write")
 def update_material(material_id: int, material: MaterialCreate):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM material_types WHERE type_id = ?", (material.type_id,))
-        if not cursor.fetchone():
+        if not reference_cache.exists("material_types", material.type_id):
             raise HTTPException(status_code=400, detail="Material type not found")
-        if material.vendor_id:
-            cursor.execute("SELECT * FROM vendors WHERE vendor_id = ?", (material.vendor_id,))
-            if not cursor.fetchone():
-                raise HTTPException(status_code=400, detail="Vendor not found")
+        if material.vendor_id and not reference_cache.exists("vendors", material.vendor_id):
+            raise HTTPException(status_code=400, detail="Vendor not found")
         
         cursor.execute(
             """UPDATE materials SET type_id=?, vendor_id=?, price_paid_per_unit=?, units_held=?,
@@ -839,10 +2223,12 @@ def update_material(material_id: int, material: MaterialCreate):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Material not found")
         conn.commit()
+        publish_change("materials", "update", material_id)
         cursor.execute("SELECT * FROM materials WHERE material_id = ?", (material_id,))
         return dict(cursor.fetchone())
 
 @app.delete("/materials/{material_id}")
+@db_task("write")
 def delete_material(material_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -850,10 +2236,12 @@ def delete_material(material_id: int):
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Material not found")
         conn.commit()
+        publish_change("materials", "delete", material_id)
     return {"message": "Material deleted"}
 
 # Employee endpoints
 @app.post("/employees", response_model=Employee)
+@db_task("write")
 def create_employee(employee: EmployeeCreate):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -862,29 +2250,68 @@ def create_employee(employee: EmployeeCreate):
             (employee.name, employee.phone, employee.status, employee.role)
         )
         emp_id = cursor.lastrowid
+        reference_cache.invalidate("employees", "work_crews")
         conn.commit()
         cursor.execute("SELECT * FROM employees WHERE employee_id = ?", (emp_id,))
         return dict(cursor.fetchone())
 
 @app.get("/employees", response_model=List[Employee])
-def get_employees():
+@db_task("read")
+def get_employees(response: Response, limit: Optional[int] = Query(None, ge=1, le=LIST_MAX_LIMIT), after: Optional[str] = None,
+                  sort: Optional[str] = None, status: Optional[str] = None, role: Optional[str] = None):
+    if limit is None and after is None and sort is None and status is None and role is None:
+        return list_response(response, reference_cache.rows("employees"), "employees")
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM employees ORDER BY name")
-        return [dict(row) for row in cursor.fetchall()]
+        rows = fetch_page(cursor, response, "employees", limit, after, sort, status=status, role=role)
+        return list_response(response, rows, "employees")
 
 @app.delete("/employees/{employee_id}")
+@db_task("write")
 def delete_employee(employee_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
+        # Take the employee off any crews first
+        cursor.execute("DELETE FROM crew_members WHERE employee_id = ?", (employee_id,))
         cursor.execute("DELETE FROM employees WHERE employee_id = ?", (employee_id,))
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Employee not found")
+        reference_cache.invalidate("employees", "work_crews")
         conn.commit()
     return {"message": "Employee deleted"}
 
 # Work Crew endpoints
+def load_work_crews(cursor, crew_id=None):
+    """Fetch crews with their members in one LEFT JOIN pass, grouped in memory."""
+    sql = """
+        SELECT wc.crew_id, wc.name, wc.status,
+               e.employee_id AS member_employee_id, e.name AS member_name, e.phone AS member_phone,
+               e.status AS member_status, e.role AS member_role
+        FROM work_crews wc
+        LEFT JOIN crew_members cm ON cm.crew_id = wc.crew_id
+        LEFT JOIN employees e ON e.employee_id = cm.employee_id
+    """
+    params = ()
+    if crew_id is not None:
+        sql += " WHERE wc.crew_id = ?"
+        params = (crew_id,)
+    cursor.execute(sql + " ORDER BY wc.name, wc.crew_id, cm.id", params)
+    crews = {}
+    for row in cursor.fetchall():
+        crew = crews.get(row['crew_id'])
+        if crew is None:
+            crew = crews[row['crew_id']] = {
+                'crew_id': row['crew_id'], 'name': row['name'], 'status': row['status'], 'members': []
+            }
+        if row['member_employee_id'] is not None:
+            crew['members'].append({
+                'employee_id': row['member_employee_id'], 'name': row['member_name'],
+                'phone': row['member_phone'], 'status': row['member_status'], 'role': row['member_role']
+            })
+    return list(crews.values())
+
 @app.post("/work-crews", response_model=WorkCrew)
+@db_task("write")
 def create_work_crew(crew: WorkCrewCreate):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -894,74 +2321,962 @@ def create_work_crew(crew: WorkCrewCreate):
         )
         crew_id = cursor.lastrowid
         
-        for emp_id in crew.member_ids:
-            cursor.execute("INSERT INTO crew_members (crew_id, employee_id) VALUES (?, ?)", (crew_id, emp_id))
+        try:
+            cursor.executemany("INSERT INTO crew_members (crew_id, employee_id) VALUES (?, ?)",
+                               [(crew_id, emp_id) for emp_id in crew.member_ids])
+        except sqlite3.IntegrityError as exc:
+            raise missing_parent(cursor, exc, [("employees", "employee_id", emp_id, "Employee not found")
+                                               for emp_id in crew.member_ids]) or exc
         
+        reference_cache.invalidate("work_crews")
         conn.commit()
         
-        # Get crew with members
-        cursor.execute("SELECT * FROM work_crews WHERE crew_id = ?", (crew_id,))
-        result = dict(cursor.fetchone())
-        cursor.execute("""
-            SELECT e.* FROM employees e
-            JOIN crew_members cm ON e.employee_id = cm.employee_id
-            WHERE cm.crew_id = ?
-        """, (crew_id,))
-        result['members'] = [dict(row) for row in cursor.fetchall()]
-        return result
+        return load_work_crews(cursor, crew_id)[0]
 
 @app.get("/work-crews", response_model=List[WorkCrew])
+@db_task("read")
 def get_work_crews():
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM work_crews ORDER BY name")
-        crews = []
-        for row in cursor.fetchall():
-            crew = dict(row)
-            cursor.execute("""
-                SELECT e.* FROM employees e
-                JOIN crew_members cm ON e.employee_id = cm.employee_id
-                WHERE cm.crew_id = ?
-            """, (crew['crew_id'],))
-            crew['members'] = [dict(row) for row in cursor.fetchall()]
-            crews.append(crew)
-        return crews
+    return reference_cache.rows("work_crews")
 
 @app.get("/work-crews/{crew_id}")
+@db_task("read")
 def get_work_crew(crew_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM work_crews WHERE crew_id = ?", (crew_id,))
-        row = cursor.fetchone()
-        if not row:
+        crews = load_work_crews(cursor, crew_id)
+        if not crews:
             raise HTTPException(status_code=404, detail="Work crew not found")
-        crew = dict(row)
-        cursor.execute("""
-            SELECT e.* FROM employees e
-            JOIN crew_members cm ON e.employee_id = cm.employee_id
-            WHERE cm.crew_id = ?
-        """, (crew_id,))
-        crew['members'] = [dict(row) for row in cursor.fetchall()]
-        return crew
+        return crews[0]
 
 @app.delete("/work-crews/{crew_id}")
+@db_task("write")
 def delete_work_crew(crew_id: int):
     with get_db() as conn:
         cursor = conn.cursor()
+        # Unassign the crew's jobs first; its crew_members rows cascade
+        unassigned = cursor.execute(
+            "UPDATE jobs SET crew_id = NULL WHERE crew_id = ? RETURNING job_id", (crew_id,)
+        ).fetchall()
         cursor.execute("DELETE FROM work_crews WHERE crew_id = ?", (crew_id,))
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Work crew not found")
+        reference_cache.invalidate("work_crews")
         conn.commit()
+        for row in unassigned:
+            publish_change("jobs", "update", row["job_id"])
     return {"message": "Work crew deleted"}
 
+# Bootstrap: the collections the Jobs and Inventory screens load together,
+# read from one connection inside one read transaction so they agree.
+BOOTSTRAP_COLLECTIONS = ("jobs", "clients", "work_crews", "inventory")
+BOOTSTRAP_COERCIONS = {
+    "jobs": field_coercions(Job), "clients": field_coercions(Client),
+    "work_crews": field_coercions(WorkCrew), "inventory": field_coercions(InventoryItem),
+}
+WORK_CREW_FIELDS = ("crew_id", "name", "status", "members")
+
+def parse_fields(fields):
+    """Turn 'jobs.job_id,clients.name' into {'jobs': ['job_id'], 'clients': ['name']}."""
+    projection = {}
+    for item in filter(None, (part.strip() for part in (fields or "").split(","))):
+        collection, _, field = item.partition(".")
+        if collection not in BOOTSTRAP_COLLECTIONS or not field:
+            raise HTTPException(status_code=400, detail=f"Invalid field: {item}")
+        projection.setdefault(collection, []).append(field)
+    return projection
+
+@app.get("/bootstrap")
+@db_task("read")
+def get_bootstrap(include: str = ",".join(BOOTSTRAP_COLLECTIONS), fields: Optional[str] = None):
+    collections = [name.strip() for name in include.split(",") if name.strip()]
+    unknown = [name for name in collections if name not in BOOTSTRAP_COLLECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collection: {unknown[0]}")
+    projection = parse_fields(fields)
+    result = {}
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if not conn.in_transaction:
+            cursor.execute("BEGIN")
+        for name in collections:
+            wanted = projection.get(name)
+            if name == "work_crews":
+                valid = WORK_CREW_FIELDS
+            else:
+                valid = [column['name'] for column in cursor.execute(f"PRAGMA table_info({name})").fetchall()]
+            for field in wanted or ():
+                if field not in valid:
+                    raise HTTPException(status_code=400, detail=f"Invalid field: {name}.{field}")
+            if name == "work_crews":
+                crews = load_work_crews(cursor)
+                rows = [{field: crew[field] for field in wanted} for crew in crews] if wanted else crews
+            else:
+                sql, params, _ = build_list_query(name, select=", ".join(wanted) if wanted else "*")
+                cursor.execute(sql, params)
+                rows = [dict(row) for row in cursor.fetchall()]
+            result[name] = coerce_rows(rows, BOOTSTRAP_COERCIONS[name])
+        conn.rollback()
+    return result
+
+# Change events. Write handlers publish to an in-process bus after they
+# commit; GET /events relays them to browsers as Server-Sent Events.
+EVENT_QUEUE_SIZE = int(os.environ.get("EVENT_QUEUE_SIZE", "100"))
+EVENT_KEEPALIVE = 15
+EVENT_TABLES = ("jobs", "inventory", "estimates", "materials")
+
+class Subscriber:
+    def __init__(self, loop, tables, queue_size):
+        self.loop = loop
+        self.tables = tables
+        self.queue = asyncio.Queue(queue_size)
+
+class EventBus:
+    """Fan-out of change events to subscribers, each with a bounded queue.
+
+    publish() is safe to call from any thread. A subscriber whose queue is
+    full is dropped (it receives a final None) instead of blocking writers.
+    """
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, tables=None):
+        subscriber = Subscriber(asyncio.get_running_loop(), tables, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        with self._lock:
+            self.published += 1
+            subscribers = [s for s in self._subscribers if not s.tables or event["table"] in s.tables]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(self._deliver, subscriber, event)
+            except RuntimeError:
+                # The subscriber's event loop has already shut down
+                self.unsubscribe(subscriber)
+
+    def _deliver(self, subscriber, event):
+        if subscriber not in self._subscribers:
+            return
+        try:
+            subscriber.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.unsubscribe(subscriber)
+            with self._lock:
+                self.dropped += 1
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "published": self.published, "dropped": self.dropped}
+
+bus = EventBus(EVENT_QUEUE_SIZE)
+
+def publish_change(table, op, row_id):
+    on_commit(functools.partial(broadcast_change, {"table": table, "op": op, "id": row_id}))
+
+def broadcast_change(event):
+    bus.publish(event)
+    notifier.send("change", event)
+
+async def event_stream(subscriber):
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), EVENT_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                yield "event: dropped\ndata: {}\n\n"
+                break
+            yield f"event: change\ndata: {json.dumps(event)}\n\n"
+    finally:
+        bus.unsubscribe(subscriber)
+
+@app.get("/events")
+async def get_events(tables: str = ",".join(EVENT_TABLES)):
+    wanted = {name.strip() for name in tables.split(",") if name.strip()}
+    unknown = wanted - set(EVENT_TABLES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown table: {sorted(unknown)[0]}")
+    return StreamingResponse(
+        event_stream(bus.subscribe(wanted)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Delta sync: GET /sync?since=<token> returns rows inserted or updated since
+# the token plus tombstones for deleted ones, and a new token to resume from.
+SYNC_MAX_LIMIT = 5000
+
+@app.get("/sync")
+@db_task("read")
+def get_sync(since: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=SYNC_MAX_LIMIT)):
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if not conn.in_transaction:
+            cursor.execute("BEGIN")
+        cursor.execute(
+            "SELECT version, table_name, row_id, deleted FROM change_log WHERE version > ? ORDER BY version LIMIT ?",
+            (since, limit + 1)
+        )
+        entries = cursor.fetchall()
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        changes = {}
+        live = {}
+        for entry in entries:
+            table = changes.setdefault(entry['table_name'], {"upserts": [], "deletes": []})
+            if entry['deleted']:
+                table["deletes"].append(entry['row_id'])
+            else:
+                live.setdefault(entry['table_name'], []).append(entry['row_id'])
+        for table_name, row_ids in live.items():
+            cursor.execute(
+                f"SELECT * FROM {table_name} WHERE {SYNC_TABLES[table_name]} IN (SELECT value FROM json_each(?))",
+                (json.dumps(row_ids),)
+            )
+            changes[table_name]["upserts"] = [dict(row) for row in cursor.fetchall()]
+        conn.rollback()
+    return {
+        "token": str(entries[-1]['version'] if entries else since),
+        "has_more": has_more,
+        "changes": changes,
+    }
+
+# Batch requests: POST /batch runs a list of API calls through the app on
+# one connection, each inside a savepoint. Failed calls are rolled back to
+# their savepoint; with "atomic" the first failure rolls back the whole batch.
+# A batch with writes runs as a single writer job; read-only batches (and all
+# batches with DB_SINGLE_WRITER off) use a pooled connection.
+BATCH_MAX_REQUESTS = 100
+BATCH_EXCLUDED_PATHS = ("/batch", "/events")
+
+class BatchRequest(BaseModel):
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+
+class Batch(BaseModel):
+    requests: List[BatchRequest]
+    atomic: bool = False
+
+async def call_route(method, path, body):
+    """Run one request through the app in-process; returns (status, body)."""
+    path, _, query = path.partition("?")
+    payload = b"" if body is None else json.dumps(body).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http",
+        "method": method.upper(), "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "client": None, "server": None,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+    }
+    pending = [{"type": "http.request", "body": payload, "more_body": False}]
+    response = {"status": 500, "headers": [], "body": b""}
+
+    async def receive():
+        if pending:
+            return pending.pop()
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        logger.exception("Batch request %s %s failed", method, path)
+        return 500, {"detail": "Internal Server Error"}
+    content_type = dict(response["headers"]).get(b"content-type", b"")
+    if not response["body"]:
+        return response["status"], None
+    if content_type.startswith(b"application/json"):
+        return response["status"], json.loads(response["body"])
+    return response["status"], response["body"].decode(errors="replace")
+
+class BatchAborted(Exception):
+    """An atomic batch hit a failing request; carries the responses so far."""
+
+    def __init__(self, responses):
+        super().__init__("Batch aborted")
+        self.responses = responses
+
+async def execute_batch(requests, atomic):
+    """Run `requests` on the current batch connection, each in a savepoint."""
+    conn = batch_connection.get()
+    callbacks = after_commit.get()
+    responses = []
+    for sub in requests:
+        registered = len(callbacks)
+        conn.execute("SAVEPOINT batch_request")
+        status, body = await call_route(sub.method, sub.path, sub.body)
+        if status >= 400:
+            conn.execute("ROLLBACK TO batch_request")
+            del callbacks[registered:]
+        conn.execute("RELEASE batch_request")
+        responses.append({"status": status, "body": body})
+        if status >= 400 and atomic:
+            raise BatchAborted(responses)
+    return responses
+
+def run_batch_job(loop, requests, atomic):
+    """Writer job for a batch with writes: the batch runs on the event loop
+    against the writer's connection while this thread waits, so it commits
+    with the writer's group and never competes with it for the lock."""
+    return asyncio.run_coroutine_threadsafe(execute_batch(requests, atomic), loop).result()
+
+async def run_pooled_batch(requests, atomic, writes):
+    conn = await run_db("write", pool.acquire)
+    callbacks = []
+    connection_token = batch_connection.set(BatchConnection(conn))
+    callbacks_token = after_commit.set(callbacks)
+    try:
+        await run_db("write", conn.execute, "BEGIN IMMEDIATE" if writes else "BEGIN")
+        responses = await execute_batch(requests, atomic)
+        await run_db("write", conn.commit)
+    finally:
+        batch_connection.reset(connection_token)
+        after_commit.reset(callbacks_token)
+        pool.release(conn)
+    for callback in callbacks:
+        callback()
+    return responses
+
+@app.post("/batch")
+async def run_batch(batch: Batch):
+    if len(batch.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_REQUESTS} requests per batch")
+    for sub in batch.requests:
+        path = sub.path.partition("?")[0]
+        if not path.startswith("/") or path in BATCH_EXCLUDED_PATHS or path.endswith("/import"):
+            raise HTTPException(status_code=400, detail=f"Not allowed in a batch: {sub.path}")
+    writes = any(sub.method.upper() != "GET" for sub in batch.requests)
+    try:
+        if writes and DB_SINGLE_WRITER:
+            job = writer.submit(run_batch_job, asyncio.get_running_loop(), batch.requests, batch.atomic)
+            responses = await asyncio.wrap_future(job)
+        else:
+            responses = await run_pooled_batch(batch.requests, batch.atomic, writes)
+    except BatchAborted as exc:
+        return {"committed": False, "responses": exc.responses}
+    return {"committed": True, "responses": responses}
+
+# Response compression. JSON bodies of at least COMPRESSION_MIN_SIZE bytes
+# are sent br (when the optional brotli package is installed) or gzip,
+# whichever the client accepts. Streams (exports, SSE) are left alone.
+# Responses for PRECOMPRESSED_PATHS are cached already compressed, keyed by
+# their ETag, so a repeat hit skips both the handler and the compressor.
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+PRECOMPRESSED_PATHS = {"/material-types", "/vendors", "/work-crews", "/employees"}
+PRECOMPRESSED_CACHE_SIZE = 256
+precompressed = OrderedDict()
+
+def choose_encoding(accept_encoding):
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip()] = q
+    for encoding in (("br", "gzip") if brotli else ("gzip",)):
+        if offered.get(encoding, offered.get("*", 0)) > 0:
+            return encoding
+    return None
+
+def compress(body, encoding, best=False):
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 5)
+    return gzip.compress(body, compresslevel=9 if best else 6)
+
+@app.middleware("http")
+async def compress_response(request: Request, call_next):
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        response = await call_next(request)
+        if response.status_code == 200 and response.headers.get("content-type", "").startswith("application/json"):
+            response.headers["vary"] = "Accept-Encoding"
+        return response
+    etag = getattr(request.state, "etag", None)
+    cache_key = None
+    if request.method == "GET" and etag and request.url.path in PRECOMPRESSED_PATHS:
+        cache_key = (request.url.path, request.url.query, etag, encoding)
+        cached = precompressed.get(cache_key)
+        if cached is not None:
+            precompressed.move_to_end(cache_key)
+            body, headers = cached
+            return Response(body, headers=headers)
+    response = await call_next(request)
+    if (response.status_code != 200 or "content-encoding" in response.headers
+            or not response.headers.get("content-type", "").startswith("application/json")):
+        return response
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    headers["vary"] = "Accept-Encoding"
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return Response(body, status_code=response.status_code, headers=headers, background=response.background)
+    body = await run_in_threadpool(compress, body, encoding, cache_key is not None)
+    headers["content-encoding"] = encoding
+    if etag:
+        # A compressed body is a different byte sequence, so the tag is weak
+        headers["etag"] = "W/" + etag
+    if cache_key is not None:
+        precompressed[cache_key] = (body, headers)
+        while len(precompressed) > PRECOMPRESSED_CACHE_SIZE:
+            precompressed.popitem(last=False)
+    return Response(body, status_code=response.status_code, headers=headers, background=response.background)
+
+# Conditional GETs. Each resource's ETag is built from the change_log
+# versions of the tables it reads (bumped by the triggers on every write),
+# so If-None-Match is answered with a 304 before the handler touches a row.
+# Only GETs that resolve to a route get a tag, and single-row routes only
+# when the row exists, so a 304 never stands in for a 404.
+ETAG_TABLES = {
+    "clients": ("clients",),
+    "jobs": ("jobs",),
+    "inventory": ("inventory",),
+    "estimates": ("estimates", "estimate_materials"),
+    "material-types": ("material_types",),
+    "vendors": ("vendors",),
+    "materials": ("materials",),
+    "employees": ("employees",),
+    "work-crews": ("work_crews", "crew_members", "employees"),
+    "bootstrap": ("jobs", "clients", "work_crews", "crew_members", "employees", "inventory"),
+    "reports": tuple(SYNC_TABLES),
+}
+
+def read_versions(conn, tables):
+    row = conn.execute(
+        "SELECT " + ", ".join("(SELECT MAX(version) FROM change_log WHERE table_name = ?)" for _ in tables),
+        tables
+    ).fetchone()
+    return [version or 0 for version in row]
+
+ETAG_ROWS = {
+    "/clients/{account_id}": ("clients", "account_id"),
+    "/jobs/{job_id}": ("jobs", "job_id"),
+    "/inventory/{item_id}": ("inventory", "item_id"),
+    "/estimates/{estimate_id}": ("estimates", "estimate_id"),
+    "/vendors/{vendor_id}": ("vendors", "vendor_id"),
+    "/materials/{material_id}": ("materials", "material_id"),
+    "/work-crews/{crew_id}": ("work_crews", "crew_id"),
+}
+
+def resolve_get(scope):
+    """The route path and path params a GET resolves to, or (None, None)."""
+    for route in app.router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return route.path, child_scope.get("path_params", {})
+    return None, None
+
+def etag_for(route_path, params):
+    """The current ETag for a GET on `route_path`, or None if it is not cacheable."""
+    parts = route_path.strip("/").split("/")
+    tables = ETAG_TABLES.get(parts[0])
+    # Import job status lives outside the table it imports into
+    if tables is None or parts[1:2] == ["import"]:
+        return None
+    if "report_id" in params and params["report_id"] not in REPORTS:
+        return None
+    with get_db() as conn:
+        if route_path in ETAG_ROWS:
+            table, key = ETAG_ROWS[route_path]
+            if conn.execute(f"SELECT 1 FROM {table} WHERE {key} = ?", (params[key],)).fetchone() is None:
+                return None
+        versions = read_versions(conn, tables)
+    reference_cache.check_versions(dict(zip(tables, versions)))
+    return '"' + ".".join(str(version) for version in versions) + '"'
+
+def etag_matches(if_none_match, etag):
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+@app.middleware("http")
+async def conditional_get(request: Request, call_next):
+    if request.method != "GET":
+        return await call_next(request)
+    route_path, params = resolve_get(request.scope)
+    if route_path is None:
+        return await call_next(request)
+    try:
+        etag = await run_db("read", etag_for, route_path, params)
+    except HTTPException as exc:
+        # Raised outside the router, so the app's exception handlers never see it
+        return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers)
+    if etag is None:
+        return await call_next(request)
+    request.state.etag = etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding, If-None-Match"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.setdefault("ETag", etag)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["Vary"] = headers["Vary"]
+    return response
+
+# Reports. Each report is one aggregate query; results share the
+# title/columns/rows/summary shape the Reports screen renders directly.
+REPORTS = {}
+
+def report(report_id, name, description):
+    def register(func):
+        REPORTS[report_id] = {"name": name, "description": description, "run": func}
+        return func
+    return register
+
+def money(value):
+    return f"${(value or 0):.2f}"
+
+def date_range(params, column):
+    """SQL conditions and parameters for the optional date_from/date_to report params."""
+    where, args = [], []
+    if params.get("date_from"):
+        where.append(f"{column} >= ?")
+        args.append(params["date_from"])
+    if params.get("date_to"):
+        where.append(f"{column} <= ?")
+        args.append(params["date_to"])
+    return where, args
+
+class ReportInfo(BaseModel):
+    id: str
+    name: str
+    description: str
+
+class ReportResult(BaseModel):
+    title: str
+    columns: List[str]
+    rows: List[Dict[str, Any]]
+    summary: str = ""
+
+@report("low_materials", "Low Materials Report", "Materials where units held <= reorder threshold")
+def report_low_materials(cursor, params):
+    cursor.execute("""
+        SELECT m.material_id, t.name AS type_name, m.description, m.units_held, m.reorder_threshold,
+               m.vendor_id, v.name AS vendor_name
+        FROM materials m
+        LEFT JOIN material_types t ON t.type_id = m.type_id
+        LEFT JOIN vendors v ON v.vendor_id = m.vendor_id
+        WHERE m.units_held <= m.reorder_threshold
+        ORDER BY m.material_id
+    """)
+    rows = [{
+        'Material ID': r['material_id'],
+        'Type': r['type_name'] or 'Unknown',
+        'Description': r['description'] or '—',
+        'Units Held': r['units_held'],
+        'Reorder Threshold': r['reorder_threshold'],
+        'Vendor': (r['vendor_name'] or 'Unknown') if r['vendor_id'] else '—',
+    } for r in cursor.fetchall()]
+    return {
+        'title': 'Low Materials Report',
+        'columns': ['Material ID', 'Type', 'Description', 'Units Held', 'Reorder Threshold', 'Vendor'],
+        'rows': rows,
+        'summary': f"Found {len(rows)} material(s) at or below reorder threshold",
+    }
+
+@report("inventory_value", "Inventory Value Report", "Total value of all inventory")
+def report_inventory_value(cursor, params):
+    cursor.execute("""
+        SELECT a.source, CASE a.source WHEN 'materials' THEN COALESCE(t.name, 'Unknown')
+                                       ELSE COALESCE(a.type_key, 'Unknown') END AS category,
+               a.total_value AS value
+        FROM type_valuation_totals a
+        LEFT JOIN material_types t ON a.source = 'materials' AND t.type_id = a.type_key
+        WHERE a.item_count > 0
+        ORDER BY a.source, category
+    """)
+    groups = {'inventory': {}, 'materials': {}}
+    for r in cursor.fetchall():
+        totals = groups[r['source']]
+        totals[r['category']] = totals.get(r['category'], 0) + (r['value'] or 0)
+    inventory_total = sum(groups['inventory'].values())
+    materials_total = sum(groups['materials'].values())
+    rows = [{'Category': f"Job Inv: {category}", 'Total Value': money(value)} for category, value in groups['inventory'].items()]
+    rows.append({'Category': '--- Job Inventory Subtotal ---', 'Total Value': money(inventory_total)})
+    rows += [{'Category': f"Stock: {category}", 'Total Value': money(value)} for category, value in groups['materials'].items()]
+    rows.append({'Category': '--- Materials Stock Subtotal ---', 'Total Value': money(materials_total)})
+    rows.append({'Category': 'Combined Total', 'Total Value': money(inventory_total + materials_total)})
+    return {'title': 'Inventory Value Report', 'columns': ['Category', 'Total Value'], 'rows': rows}
+
+@report("active_clients", "Active Clients", "List of all active clients")
+def report_active_clients(cursor, params):
+    cursor.execute("SELECT account_id, name, phone, address FROM clients WHERE status = 'active' ORDER BY account_id")
+    rows = [{'ID': r['account_id'], 'Name': r['name'], 'Phone': r['phone'], 'Address': r['address']}
+            for r in cursor.fetchall()]
+    return {
+        'title': 'Active Clients',
+        'columns': ['ID', 'Name', 'Phone', 'Address'],
+        'rows': rows,
+        'summary': f"Total active clients: {len(rows)}",
+    }
+
+@report("pending_estimates", "Pending Estimates", "Estimates with pending status")
+def report_pending_estimates(cursor, params):
+    where, args = ["e.status = 'pending'"], []
+    if params.get("client_id") is not None:
+        where.append("e.client_id = ?")
+        args.append(params["client_id"])
+    cursor.execute(f"""
+        SELECT e.estimate_id, c.name AS client_name, e.total_estimate_cost, e.scheduled_date
+        FROM estimates e LEFT JOIN clients c ON c.account_id = e.client_id
+        WHERE {' AND '.join(where)}
+        ORDER BY e.estimate_id DESC
+    """, args)
+    rows = [{
+        'Estimate ID': r['estimate_id'],
+        'Client': r['client_name'] or 'Unknown',
+        'Total Cost': money(r['total_estimate_cost']),
+        'Scheduled Date': r['scheduled_date'] or '—',
+    } for r in cursor.fetchall()]
+    return {
+        'title': 'Pending Estimates',
+        'columns': ['Estimate ID', 'Client', 'Total Cost', 'Scheduled Date'],
+        'rows': rows,
+        'summary': f"Total pending estimates: {len(rows)}",
+    }
+
+@report("job_schedule", "Job Schedule", "Scheduled jobs with assigned work crews")
+def report_job_schedule(cursor, params):
+    where, args = date_range(params, "j.scheduled_date")
+    if params.get("client_id") is not None:
+        where.append("j.client_account_id = ?")
+        args.append(params["client_id"])
+    cursor.execute(f"""
+        SELECT j.scheduled_date, j.job_id, c.name AS client_name, j.address, j.crew_id,
+               w.name AS crew_name, j.cost_estimate
+        FROM jobs j
+        LEFT JOIN clients c ON c.account_id = j.client_account_id
+        LEFT JOIN work_crews w ON w.crew_id = j.crew_id
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY j.scheduled_date, j.job_id
+    """, args)
+    rows = [{
+        'Date': r['scheduled_date'],
+        'Job ID': r['job_id'],
+        'Client': r['client_name'] or 'Unknown',
+        'Address': r['address'],
+        'Crew': (r['crew_name'] or 'Unknown') if r['crew_id'] else '—',
+        'Cost': money(r['cost_estimate']),
+    } for r in cursor.fetchall()]
+    return {
+        'title': 'Job Schedule',
+        'columns': ['Date', 'Job ID', 'Client', 'Address', 'Crew', 'Cost'],
+        'rows': rows,
+        'summary': f"Total scheduled jobs: {len(rows)}",
+    }
+
+@report("estimate_conversion", "Estimate Conversion Rate", "Accepted vs pending/rejected estimates")
+def report_estimate_conversion(cursor, params):
+    cursor.execute("""
+        SELECT status, COUNT(*) AS count, SUM(total_estimate_cost) AS value
+        FROM estimates GROUP BY status
+    """)
+    by_status = {r['status']: (r['count'], r['value'] or 0) for r in cursor.fetchall()}
+    total = sum(count for count, _ in by_status.values())
+
+    def percent(count):
+        return f"{count / total * 100:.1f}%" if total else '0%'
+
+    rows = []
+    for status in ('accepted', 'pending', 'rejected'):
+        count, value = by_status.get(status, (0, 0))
+        rows.append({'Status': status.capitalize(), 'Count': count, 'Percentage': percent(count), 'Total Value': money(value)})
+    accepted = by_status.get('accepted', (0, 0))[0]
+    return {
+        'title': 'Estimate Conversion Rate',
+        'columns': ['Status', 'Count', 'Percentage', 'Total Value'],
+        'rows': rows,
+        'summary': f"Total Estimates: {total} | Acceptance Rate: {f'{accepted / total * 100:.1f}' if total else 0}%",
+    }
+
+@report("vendor_spend", "Vendor Spend", "Total spent per vendor for materials")
+def report_vendor_spend(cursor, params):
+    cursor.execute("""
+        SELECT a.vendor_key AS vendor_id, v.name AS vendor_name, a.total_units, a.total_value
+        FROM vendor_spend_totals a LEFT JOIN vendors v ON v.vendor_id = a.vendor_key
+        WHERE a.material_count > 0
+        ORDER BY a.total_value DESC
+    """)
+    rows, grand_total = [], 0
+    for r in cursor.fetchall():
+        grand_total += r['total_value'] or 0
+        rows.append({
+            'Vendor': (r['vendor_name'] or 'Unknown') if r['vendor_id'] else 'No Vendor',
+            'Total Units': f"{(r['total_units'] or 0):.1f}",
+            'Total Value': money(r['total_value']),
+        })
+    return {
+        'title': 'Vendor Spend Report',
+        'columns': ['Vendor', 'Total Units', 'Total Value'],
+        'rows': rows,
+        'summary': f"Grand Total: {money(grand_total)}",
+    }
+
+@report("crew_utilization", "Crew Utilization", "Jobs completed per crew")
+def report_crew_utilization(cursor, params):
+    where, args = date_range(params, "j.scheduled_date")
+    cursor.execute(f"""
+        SELECT j.crew_id, w.name AS crew_name, COUNT(*) AS job_count, SUM(j.cost_estimate) AS total_value
+        FROM jobs j LEFT JOIN work_crews w ON w.crew_id = j.crew_id
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        GROUP BY COALESCE(j.crew_id, 0)
+        ORDER BY job_count DESC
+    """, args)
+    rows, total_jobs = [], 0
+    for r in cursor.fetchall():
+        total_jobs += r['job_count']
+        rows.append({
+            'Crew': (r['crew_name'] or 'Unknown') if r['crew_id'] else 'Unassigned',
+            'Jobs Assigned': r['job_count'],
+            'Total Value': money(r['total_value']),
+        })
+    return {
+        'title': 'Crew Utilization',
+        'columns': ['Crew', 'Jobs Assigned', 'Total Value'],
+        'rows': rows,
+        'summary': f"Total Jobs: {total_jobs}",
+    }
+
+@report("monthly_summary", "Monthly Job Summary", "Jobs and revenue by month")
+def report_monthly_summary(cursor, params):
+    cursor.execute("""
+        SELECT month, job_count, total_estimate, total_actual
+        FROM job_month_totals WHERE job_count > 0 ORDER BY month DESC LIMIT ?
+    """, (params.get("months") or 12,))
+    rows = [{
+        'Month': r['month'],
+        'Jobs': r['job_count'],
+        'Est. Revenue': money(r['total_estimate']),
+        'Actual Revenue': money(r['total_actual']) if r['total_actual'] else '—',
+    } for r in cursor.fetchall()]
+    return {'title': 'Monthly Job Summary', 'columns': ['Month', 'Jobs', 'Est. Revenue', 'Actual Revenue'], 'rows': rows}
+
+@report("actual_vs_estimated", "Actual vs Estimated", "Compare actual costs to estimates")
+def report_actual_vs_estimated(cursor, params):
+    where, args = date_range(params, "j.scheduled_date")
+    where.append("j.actual_total_cost IS NOT NULL")
+    cursor.execute(f"""
+        SELECT j.job_id, c.name AS client_name, j.scheduled_date, j.cost_estimate, j.actual_total_cost
+        FROM jobs j LEFT JOIN clients c ON c.account_id = j.client_account_id
+        WHERE {' AND '.join(where)}
+        ORDER BY j.scheduled_date DESC, j.job_id DESC
+    """, args)
+    rows, total_estimated, total_actual = [], 0, 0
+    for r in cursor.fetchall():
+        variance = r['actual_total_cost'] - r['cost_estimate']
+        variance_pct = f"{variance / r['cost_estimate'] * 100:.1f}" if r['cost_estimate'] else '0'
+        total_estimated += r['cost_estimate']
+        total_actual += r['actual_total_cost']
+        rows.append({
+            'Job ID': r['job_id'],
+            'Client': r['client_name'] or 'Unknown',
+            'Scheduled': r['scheduled_date'],
+            'Estimated': money(r['cost_estimate']),
+            'Actual': money(r['actual_total_cost']),
+            'Variance': f"{'+' if variance >= 0 else ''}{variance:.2f} ({variance_pct}%)",
+        })
+    return {
+        'title': 'Actual vs Estimated',
+        'columns': ['Job ID', 'Client', 'Scheduled', 'Estimated', 'Actual', 'Variance'],
+        'rows': rows,
+        'summary': (f"Jobs with actuals: {len(rows)} | Total Estimated: {money(total_estimated)}"
+                    f" | Total Actual: {money(total_actual)}"),
+    }
+
+@report("client_history", "Client Job History", "All jobs per client with details")
+def report_client_history(cursor, params):
+    where, args = ["(j.job_count IS NOT NULL OR e.estimate_count IS NOT NULL)"], []
+    if params.get("client_id") is not None:
+        where.append("c.account_id = ?")
+        args.append(params["client_id"])
+    cursor.execute(f"""
+        SELECT c.name, COALESCE(j.job_count, 0) AS job_count, COALESCE(e.estimate_count, 0) AS estimate_count,
+               COALESCE(j.job_value, 0) AS job_value, j.last_job
+        FROM clients c
+        LEFT JOIN (
+            SELECT client_account_id, COUNT(*) AS job_count, SUM(cost_estimate) AS job_value,
+                   MAX(scheduled_date) AS last_job
+            FROM jobs GROUP BY client_account_id
+        ) j ON j.client_account_id = c.account_id
+        LEFT JOIN (
+            SELECT client_id, COUNT(*) AS estimate_count FROM estimates GROUP BY client_id
+        ) e ON e.client_id = c.account_id
+        WHERE {' AND '.join(where)}
+        ORDER BY job_value DESC
+    """, args)
+    rows = [{
+        'Client': r['name'],
+        'Total Jobs': r['job_count'],
+        'Total Estimates': r['estimate_count'],
+        'Job Value': money(r['job_value']),
+        'Last Job': r['last_job'] or '—',
+    } for r in cursor.fetchall()]
+    return {
+        'title': 'Client Job History',
+        'columns': ['Client', 'Total Jobs', 'Total Estimates', 'Job Value', 'Last Job'],
+        'rows': rows,
+        'summary': f"Total Clients with History: {len(rows)}",
+    }
+
+@app.get("/reports", response_model=List[ReportInfo])
+async def get_reports():
+    return [{"id": report_id, "name": r["name"], "description": r["description"]} for report_id, r in REPORTS.items()]
+
+@app.get("/reports/{report_id}", response_model=ReportResult)
+@db_task("report")
+def run_report(report_id: str, client_id: Optional[int] = None, date_from: Optional[str] = None,
+               date_to: Optional[str] = None, months: int = Query(12, ge=1, le=120)):
+    if report_id not in REPORTS:
+        raise HTTPException(status_code=404, detail="Report not found")
+    params = {"client_id": client_id, "date_from": date_from, "date_to": date_to, "months": months}
+    with get_db() as conn:
+        return REPORTS[report_id]["run"](conn.cursor(), params)
+
+# Multi-process serving. With WORKERS > 1, `python main.py` runs that many
+# uvicorn worker processes against the same database. Each has its own pool,
+# writer thread and caches; SQLite's lock (with busy_timeout) serializes their
+# writes, and the notifications table relays change events and cache
+# invalidations between them.
+WORKERS = int(os.environ.get("WORKERS", "1"))
+NOTIFY_INTERVAL = float(os.environ.get("NOTIFY_INTERVAL", "0.5"))
+NOTIFY_RETENTION = 300
+
+def init_db_once():
+    """init_db() under an exclusive file lock. Workers starting together wait
+    for the first one, then find the schema current and skip it."""
+    with open(DB_NAME + ".lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        with get_db() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < len(SCHEMA_MIGRATIONS):
+            init_db()
+
+class Notifier:
+    """Cross-process fan-out through the notifications table.
+
+    send() queues a message for the other workers. A background thread
+    inserts queued messages and applies other processes' new ones every
+    NOTIFY_INTERVAL seconds; messages older than NOTIFY_RETENTION are pruned.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.pid = os.getpid()
+        self._outbox = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_id = 0
+        self.sent = 0
+        self.received = 0
+
+    def send(self, kind, payload):
+        if self._thread is not None:
+            self._outbox.put((kind, json.dumps(payload)))
+
+    def start(self):
+        self.pid = os.getpid()
+        with get_db() as conn:
+            self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM notifications").fetchone()[0]
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self):
+        conn = pool._connect()
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    self._exchange(conn)
+                except sqlite3.Error:
+                    logger.exception("Notification exchange failed")
+                    if conn.in_transaction:
+                        conn.rollback()
+            self._exchange(conn)
+        finally:
+            conn.close()
+
+    def _exchange(self, conn):
+        outgoing = []
+        while not self._outbox.empty():
+            outgoing.append(self._outbox.get_nowait())
+        now = time.time()
+        if outgoing:
+            conn.executemany("INSERT INTO notifications (pid, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                             [(self.pid, kind, payload, now) for kind, payload in outgoing])
+            conn.execute("DELETE FROM notifications WHERE created_at < ?", (now - NOTIFY_RETENTION,))
+            conn.commit()
+            self.sent += len(outgoing)
+        rows = conn.execute("SELECT id, pid, kind, payload FROM notifications WHERE id > ? ORDER BY id",
+                            (self._last_id,)).fetchall()
+        for row in rows:
+            self._last_id = row['id']
+            if row['pid'] == self.pid:
+                continue
+            self.received += 1
+            payload = json.loads(row['payload'])
+            if row['kind'] == "change":
+                bus.publish(payload)
+            elif row['kind'] == "invalidate":
+                reference_cache.invalidate_now(payload)
+
+    def stats(self):
+        return {"workers": WORKERS, "enabled": self._thread is not None, "pid": self.pid,
+                "sent": self.sent, "received": self.received}
+
+notifier = Notifier(NOTIFY_INTERVAL)
+
+# Database diagnostics
+@app.get("/db/status")
+@db_task("read")
+def get_db_status():
+    with get_db() as conn:
+        schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    return {"database": DB_NAME, "schema_version": schema_version, "pool": pool.stats(),
+            "settings": read_db_settings(), "events": bus.stats(), "cache": reference_cache.stats(),
+            "executors": db_executor_stats(), "writer": writer.stats(), "notifier": notifier.stats()}
+
 # Convert estimate to job
 @app.post("/estimates/{estimate_id}/convert-to-job")
+@db_task("write")
 def convert_estimate_to_job(estimate_id: int, job_data: Job):
     with get_db() as conn:
         cursor = conn.cursor()
         
         # Get the estimate
-        cursor.execute("SELECT * FROM estimates WHERE estimate_id = ?", (estimate_id,))
+        cursor.execute("SELECT status, client_id, total_estimate_cost FROM estimates WHERE estimate_id = ?", (estimate_id,))
         estimate = cursor.fetchone()
         if not estimate:
             raise HTTPException(status_code=404, detail="Estimate not found")
@@ -969,24 +3284,43 @@ def convert_estimate_to_job(estimate_id: int, job_data: Job):
         if estimate['status'] != 'accepted':
             raise HTTPException(status_code=400, detail="Only accepted estimates can be converted to jobs")
         
-        # Check if job_id already exists
-        cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (job_data.job_id,))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Job ID already exists")
-        
-        # Create the job
-        cursor.execute(
-            """INSERT INTO jobs (job_id, client_account_id, crew_id, address, scheduled_date, cost_estimate)
-               VALUES (?, ?, ?, ?, ?, ?)""",
-            (job_data.job_id, estimate['client_account_id'], job_data.crew_id, 
-             job_data.address, job_data.scheduled_date, estimate['total_estimate_cost'])
-        )
+        # Create the job; a duplicate job_id fails the primary key
+        try:
+            cursor.execute(
+                """INSERT INTO jobs (job_id, client_account_id, crew_id, address, scheduled_date, cost_estimate)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (job_data.job_id, estimate['client_id'], job_data.crew_id, 
+                 job_data.address, job_data.scheduled_date, estimate['total_estimate_cost'])
+            )
+        except sqlite3.IntegrityError as exc:
+            raise (missing_parent(cursor, exc, [("work_crews", "crew_id", job_data.crew_id, "Work crew not found")])
+                   or HTTPException(status_code=400, detail="Job ID already exists"))
         conn.commit()
+        publish_change("jobs", "create", job_data.job_id)
         
         cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (job_data.job_id,))
         return dict(cursor.fetchone())
 
+# CORS middleware - added last so it wraps every other middleware and 304s
+# carry the CORS headers too
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173", "https://dapper-kitsune-d5bc74.netlify.app"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
+)
+
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    init_db()
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    init_db_once()
+    if sys.argv[1:] == ["rebuild-aggregates"]:
+        rebuild_aggregates()
+    elif WORKERS > 1:
+        # Workers import the app by name, each in its own process
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WORKERS,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
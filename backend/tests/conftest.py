@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# main reads its settings at import time, so point it at a scratch database first
+os.environ["INVENTORY_DB"] = os.path.join(tempfile.mkdtemp(), "inventory.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    main.init_db()
+    with TestClient(main.app) as client:
+        yield client
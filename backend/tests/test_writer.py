@@ -0,0 +1,126 @@
+import sqlite3
+import threading
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def writer():
+    conn = sqlite3.connect(main.DB_NAME)
+    conn.execute("CREATE TABLE IF NOT EXISTS writer_test (name TEXT NOT NULL)")
+    conn.execute("DELETE FROM writer_test")
+    conn.commit()
+    conn.close()
+    writer = main.Writer(max_group=16)
+    yield writer
+    writer.close()
+
+
+def names():
+    conn = sqlite3.connect(main.DB_NAME)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT name FROM writer_test"))
+    finally:
+        conn.close()
+
+
+def insert(name, fail=False, callback=None):
+    with main.get_db() as conn:
+        conn.execute("INSERT INTO writer_test (name) VALUES (?)", (name,))
+        if callback is not None:
+            main.on_commit(callback)
+        if fail:
+            raise ValueError(name)
+        conn.commit()
+    return name
+
+
+def hold(writer):
+    """Occupy the writer thread so the next submissions queue up as one group."""
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    writer.submit(block)
+    assert started.wait(5)
+    return release
+
+
+def test_queued_jobs_commit_as_one_group(writer):
+    release = hold(writer)
+    futures = [writer.submit(insert, f"row{i}") for i in range(5)]
+    release.set()
+    assert [future.result(5) for future in futures] == [f"row{i}" for i in range(5)]
+    assert names() == [f"row{i}" for i in range(5)]
+    stats = writer.stats()
+    assert stats["groups"] == 2 and stats["largest_group"] == 5
+
+
+def test_failing_job_rolls_back_alone(writer):
+    committed = []
+    release = hold(writer)
+    ok = writer.submit(insert, "kept", callback=lambda: committed.append("kept"))
+    bad = writer.submit(insert, "dropped", fail=True, callback=lambda: committed.append("dropped"))
+    after = writer.submit(insert, "also kept")
+    release.set()
+    assert ok.result(5) == "kept" and after.result(5) == "also kept"
+    with pytest.raises(ValueError):
+        bad.result(5)
+    assert names() == ["also kept", "kept"]
+    assert committed == ["kept"]
+    assert writer.stats()["failed"] == 1
+
+
+def test_cancelled_job_is_skipped(writer):
+    release = hold(writer)
+    cancelled = writer.submit(insert, "cancelled")
+    kept = writer.submit(insert, "kept")
+    assert cancelled.cancel()
+    release.set()
+    assert kept.result(5) == "kept"
+    assert names() == ["kept"]
+    # The writer thread is still alive and taking work
+    assert writer.submit(insert, "later").result(5) == "later"
+
+
+def test_failing_callback_does_not_kill_writer(writer):
+    def broken():
+        raise RuntimeError("callback")
+
+    assert writer.submit(insert, "first", callback=broken).result(5) == "first"
+    assert writer.submit(insert, "second").result(5) == "second"
+    assert names() == ["first", "second"]
+
+
+def test_batch_runs_on_writer(client):
+    vendors = [{"method": "POST", "path": "/vendors", "body": {"name": f"Batch vendor {i}"}} for i in range(3)]
+    response = client.post("/batch", json={"requests": vendors}).json()
+    assert response["committed"] and [r["status"] for r in response["responses"]] == [200, 200, 200]
+    listed = {vendor["name"] for vendor in client.get("/vendors").json()}
+    assert {f"Batch vendor {i}" for i in range(3)} <= listed
+
+
+def test_atomic_batch_rolls_back(client):
+    requests = [
+        {"method": "POST", "path": "/vendors", "body": {"name": "Atomic vendor"}},
+        {"method": "DELETE", "path": "/vendors/999999"},
+    ]
+    response = client.post("/batch", json={"atomic": True, "requests": requests}).json()
+    assert not response["committed"]
+    assert [r["status"] for r in response["responses"]] == [200, 404]
+    assert not any(vendor["name"] == "Atomic vendor" for vendor in client.get("/vendors").json())
+
+
+def test_non_atomic_batch_keeps_successes(client):
+    requests = [
+        {"method": "POST", "path": "/vendors", "body": {"name": "Survivor"}},
+        {"method": "DELETE", "path": "/vendors/999999"},
+    ]
+    response = client.post("/batch", json={"requests": requests}).json()
+    assert response["committed"]
+    assert [r["status"] for r in response["responses"]] == [200, 404]
+    assert any(vendor["name"] == "Survivor" for vendor in client.get("/vendors").json())
@@ -4,6 +4,9 @@ import './App.css'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
+// Jobs and Inventory only need client and crew names for lookups
+const BOOTSTRAP_FIELDS = 'clients.account_id,clients.name,work_crews.crew_id,work_crews.name'
+
 // Client Component
 function Clients({ onError }) {
   const [clients, setClients] = useState([])
@@ -182,16 +185,11 @@ function Jobs({ onError }) {
 
   const fetchJobs = async () => {
     try {
-      const [jobsRes, clientsRes, crewsRes, inventoryRes] = await Promise.all([
-        axios.get(`${API_URL}/jobs`),
-        axios.get(`${API_URL}/clients`),
-        axios.get(`${API_URL}/work-crews`),
-        axios.get(`${API_URL}/inventory`)
-      ])
-      setJobs(jobsRes.data)
-      setClients(clientsRes.data)
-      setCrews(crewsRes.data)
-      setInventory(inventoryRes.data)
+      const res = await axios.get(`${API_URL}/bootstrap`, { params: { fields: BOOTSTRAP_FIELDS } })
+      setJobs(res.data.jobs)
+      setClients(res.data.clients)
+      setCrews(res.data.work_crews)
+      setInventory(res.data.inventory)
     } catch (e) { onError('Failed to fetch jobs') }
   }
 
@@ -416,16 +414,11 @@ function Inventory({ onError }) {
 
   const fetchData = async () => {
     try {
-      const [itemsRes, jobsRes, clientsRes, crewsRes] = await Promise.all([
-        axios.get(`${API_URL}/inventory`),
-        axios.get(`${API_URL}/jobs`),
-        axios.get(`${API_URL}/clients`),
-        axios.get(`${API_URL}/work-crews`)
-      ])
-      setItems(itemsRes.data)
-      setJobs(jobsRes.data)
-      setClients(clientsRes.data)
-      setCrews(crewsRes.data)
+      const res = await axios.get(`${API_URL}/bootstrap`, { params: { fields: BOOTSTRAP_FIELDS } })
+      setItems(res.data.inventory)
+      setJobs(res.data.jobs)
+      setClients(res.data.clients)
+      setCrews(res.data.work_crews)
     } catch (e) { onError('Failed to fetch inventory') }
   }
 
@@ -687,364 +680,9 @@ function Reports({ onError }) {
     setReportData(null)
 
     try {
-      if (selectedReport === 'low_materials') {
-        const [materialsRes, typesRes, vendorsRes] = await Promise.all([
-          axios.get(`${API_URL}/materials`),
-          axios.get(`${API_URL}/material-types`),
-          axios.get(`${API_URL}/vendors`)
-        ])
-        const typeMap = {}
-        typesRes.data.forEach(t => { typeMap[t.type_id] = t.name })
-        const vendorMap = {}
-        vendorsRes.data.forEach(v => { vendorMap[v.vendor_id] = v.name })
-        
-        const lowMaterials = materialsRes.data.filter(m => m.units_held <= m.reorder_threshold)
-        setReportData({
-          title: 'Low Materials Report',
-          columns: ['Material ID', 'Type', 'Description', 'Units Held', 'Reorder Threshold', 'Vendor'],
-          rows: lowMaterials.map(m => ({
-            'Material ID': m.material_id,
-            'Type': typeMap[m.type_id] || 'Unknown',
-            'Description': m.description || '—',
-            'Units Held': m.units_held,
-            'Reorder Threshold': m.reorder_threshold,
-            'Vendor': m.vendor_id ? (vendorMap[m.vendor_id] || 'Unknown') : '—'
-          })),
-          summary: `Found ${lowMaterials.length} material(s) at or below reorder threshold`
-        })
-      } else if (selectedReport === 'inventory_value') {
-        const [inventoryRes, materialsRes, typesRes] = await Promise.all([
-          axios.get(`${API_URL}/inventory`),
-          axios.get(`${API_URL}/materials`),
-          axios.get(`${API_URL}/material-types`)
-        ])
-        
-        const typesMap = {}
-        typesRes.data.forEach(t => { typesMap[t.type_id] = t.name })
-        
-        // Job Inventory by type
-        const inventoryByType = {}
-        inventoryRes.data.forEach(i => {
-          const typeName = typesMap[i.type_id] || i.type || 'Unknown'
-          const value = i.cost * i.quantity
-          inventoryByType[typeName] = (inventoryByType[typeName] || 0) + value
-        })
-        
-        // Materials Stock by type
-        const materialsByType = {}
-        materialsRes.data.forEach(m => {
-          const typeName = typesMap[m.type_id] || 'Unknown'
-          const value = m.price_paid_per_unit * m.units_held
-          materialsByType[typeName] = (materialsByType[typeName] || 0) + value
-        })
-        
-        const inventoryTotal = Object.values(inventoryByType).reduce((a, b) => a + b, 0)
-        const materialsTotal = Object.values(materialsByType).reduce((a, b) => a + b, 0)
-        
-        const invRows = Object.entries(inventoryByType).map(([type, value]) => ({
-          Category: `Job Inv: ${type}`, 'Total Value': `$${value.toFixed(2)}`
-        }))
-        const matRows = Object.entries(materialsByType).map(([type, value]) => ({
-          Category: `Stock: ${type}`, 'Total Value': `$${value.toFixed(2)}`
-        }))
-        
-        setReportData({
-          title: 'Inventory Value Report',
-          columns: ['Category', 'Total Value'],
-          rows: [
-            ...invRows,
-            { Category: '--- Job Inventory Subtotal ---', 'Total Value': `$${inventoryTotal.toFixed(2)}` },
-            ...matRows,
-            { Category: '--- Materials Stock Subtotal ---', 'Total Value': `$${materialsTotal.toFixed(2)}` },
-            { Category: 'Combined Total', 'Total Value': `$${(inventoryTotal + materialsTotal).toFixed(2)}` }
-          ],
-          summary: ''
-        })
-      } else if (selectedReport === 'active_clients') {
-        const clientsRes = await axios.get(`${API_URL}/clients`)
-        const activeClients = clientsRes.data.filter(c => c.status === 'active')
-        
-        setReportData({
-          title: 'Active Clients',
-          columns: ['ID', 'Name', 'Phone', 'Address'],
-          rows: activeClients.map(c => ({
-            ID: c.account_id,
-            Name: c.name,
-            Phone: c.phone,
-            Address: c.address
-          })),
-          summary: `Total active clients: ${activeClients.length}`
-        })
-      } else if (selectedReport === 'pending_estimates') {
-        const [estimatesRes, clientsRes] = await Promise.all([
-          axios.get(`${API_URL}/estimates`),
-          axios.get(`${API_URL}/clients`)
-        ])
-        const clientMap = {}
-        clientsRes.data.forEach(c => { clientMap[c.account_id] = c.name })
-        
-        const pending = estimatesRes.data.filter(e => e.status === 'pending')
-        
-        setReportData({
-          title: 'Pending Estimates',
-          columns: ['Estimate ID', 'Client', 'Total Cost', 'Scheduled Date'],
-          rows: pending.map(e => ({
-            'Estimate ID': e.estimate_id,
-            'Client': clientMap[e.client_id] || 'Unknown',
-            'Total Cost': `$${e.total_estimate_cost.toFixed(2)}`,
-            'Scheduled Date': e.scheduled_date || '—'
-          })),
-          summary: `Total pending estimates: ${pending.length}`
-        })
-      } else if (selectedReport === 'job_schedule') {
-        const [jobsRes, clientsRes, crewsRes] = await Promise.all([
-          axios.get(`${API_URL}/jobs`),
-          axios.get(`${API_URL}/clients`),
-          axios.get(`${API_URL}/work-crews`)
-        ])
-        
-        const clientMap = {}
-        clientsRes.data.forEach(c => { clientMap[c.account_id] = c.name })
-        
-        const crewMap = {}
-        crewsRes.data.forEach(c => { crewMap[c.crew_id] = c.name })
-        
-        // Sort jobs by scheduled date
-        const sortedJobs = jobsRes.data.sort((a, b) => 
-          new Date(a.scheduled_date) - new Date(b.scheduled_date)
-        )
-        
-        setReportData({
-          title: 'Job Schedule',
-          columns: ['Date', 'Job ID', 'Client', 'Address', 'Crew', 'Cost'],
-          rows: sortedJobs.map(j => ({
-            'Date': j.scheduled_date,
-            'Job ID': j.job_id,
-            'Client': clientMap[j.client_account_id] || 'Unknown',
-            'Address': j.address,
-            'Crew': j.crew_id ? (crewMap[j.crew_id] || 'Unknown') : '—',
-            'Cost': `$${j.cost_estimate.toFixed(2)}`
-          })),
-          summary: `Total scheduled jobs: ${sortedJobs.length}`
-        })
-      } else if (selectedReport === 'estimate_conversion') {
-        const estimatesRes = await axios.get(`${API_URL}/estimates`)
-        const totals = estimatesRes.data.reduce((acc, e) => {
-          acc[e.status] = (acc[e.status] || 0) + 1
-          acc.total_cost = (acc.total_cost || 0) + e.total_estimate_cost
-          acc[e.status + '_cost'] = (acc[e.status + '_cost'] || 0) + e.total_estimate_cost
-          return acc
-        }, {})
-        
-        const total = estimatesRes.data.length
-        const accepted = totals.accepted || 0
-        const pending = totals.pending || 0
-        const rejected = totals.rejected || 0
-        
-        setReportData({
-          title: 'Estimate Conversion Rate',
-          columns: ['Status', 'Count', 'Percentage', 'Total Value'],
-          rows: [
-            { Status: 'Accepted', Count: accepted, Percentage: total ? ((accepted/total)*100).toFixed(1) + '%' : '0%', 'Total Value': `$${(totals.accepted_cost || 0).toFixed(2)}` },
-            { Status: 'Pending', Count: pending, Percentage: total ? ((pending/total)*100).toFixed(1) + '%' : '0%', 'Total Value': `$${(totals.pending_cost || 0).toFixed(2)}` },
-            { Status: 'Rejected', Count: rejected, Percentage: total ? ((rejected/total)*100).toFixed(1) + '%' : '0%', 'Total Value': `$${(totals.rejected_cost || 0).toFixed(2)}` },
-          ],
-          summary: `Total Estimates: ${total} | Acceptance Rate: ${total ? ((accepted/total)*100).toFixed(1) : 0}%`
-        })
-      } else if (selectedReport === 'vendor_spend') {
-        const [materialsRes, vendorsRes, typesRes] = await Promise.all([
-          axios.get(`${API_URL}/materials`),
-          axios.get(`${API_URL}/vendors`),
-          axios.get(`${API_URL}/material-types`)
-        ])
-        
-        const vendorMap = { 0: 'No Vendor' }
-        vendorsRes.data.forEach(v => { vendorMap[v.vendor_id] = v.name })
-        
-        const spendByVendor = materialsRes.data.reduce((acc, m) => {
-          const vid = m.vendor_id || 0
-          if (!acc[vid]) {
-            acc[vid] = { vendor: vendorMap[vid], totalCost: 0, totalUnits: 0 }
-          }
-          acc[vid].totalCost += m.price_paid_per_unit * m.units_held
-          acc[vid].totalUnits += m.units_held
-          return acc
-        }, {})
-        
-        const rows = Object.values(spendByVendor)
-          .sort((a, b) => b.totalCost - a.totalCost)
-          .map(v => ({
-            Vendor: v.vendor,
-            'Total Units': v.totalUnits.toFixed(1),
-            'Total Value': `$${v.totalCost.toFixed(2)}`
-          }))
-        
-        const grandTotal = rows.reduce((sum, r) => sum + parseFloat(r['Total Value'].replace('$','')), 0)
-        
-        setReportData({
-          title: 'Vendor Spend Report',
-          columns: ['Vendor', 'Total Units', 'Total Value'],
-          rows,
-          summary: `Grand Total: $${grandTotal.toFixed(2)}`
-        })
-      } else if (selectedReport === 'crew_utilization') {
-        const [jobsRes, crewsRes, clientsRes] = await Promise.all([
-          axios.get(`${API_URL}/jobs`),
-          axios.get(`${API_URL}/work-crews`),
-          axios.get(`${API_URL}/clients`)
-        ])
-        
-        const crewMap = { 0: 'Unassigned' }
-        crewsRes.data.forEach(c => { crewMap[c.crew_id] = c.name })
-        
-        const clientMap = {}
-        clientsRes.data.forEach(c => { clientMap[c.account_id] = c.name })
-        
-        const utilization = jobsRes.data.reduce((acc, j) => {
-          const cid = j.crew_id || 0
-          if (!acc[cid]) {
-            acc[cid] = { crew: crewMap[cid], jobCount: 0, totalValue: 0 }
-          }
-          acc[cid].jobCount++
-          acc[cid].totalValue += j.cost_estimate
-          return acc
-        }, {})
-        
-        const rows = Object.values(utilization)
-          .sort((a, b) => b.jobCount - a.jobCount)
-          .map(u => ({
-            Crew: u.crew,
-            'Jobs Assigned': u.jobCount,
-            'Total Value': `$${u.totalValue.toFixed(2)}`
-          }))
-        
-        setReportData({
-          title: 'Crew Utilization',
-          columns: ['Crew', 'Jobs Assigned', 'Total Value'],
-          rows,
-          summary: `Total Jobs: ${jobsRes.data.length}`
-        })
-      } else if (selectedReport === 'monthly_summary') {
-        const [jobsRes, clientsRes] = await Promise.all([
-          axios.get(`${API_URL}/jobs`),
-          axios.get(`${API_URL}/clients`)
-        ])
-        
-        const clientMap = {}
-        clientsRes.data.forEach(c => { clientMap[c.account_id] = c.name })
-        
-        const monthly = jobsRes.data.reduce((acc, j) => {
-          const month = j.scheduled_date.substring(0, 7) // YYYY-MM
-          if (!acc[month]) {
-            acc[month] = { month, jobCount: 0, totalEstimate: 0, totalActual: 0 }
-          }
-          acc[month].jobCount++
-          acc[month].totalEstimate += j.cost_estimate
-          acc[month].totalActual += j.actual_total_cost || 0
-          return acc
-        }, {})
-        
-        const rows = Object.values(monthly)
-          .sort((a, b) => b.month.localeCompare(a.month))
-          .slice(0, 12)
-          .map(m => ({
-            Month: m.month,
-            Jobs: m.jobCount,
-            'Est. Revenue': `$${m.totalEstimate.toFixed(2)}`,
-            'Actual Revenue': m.totalActual ? `$${m.totalActual.toFixed(2)}` : '—',
-          }))
-        
-        setReportData({
-          title: 'Monthly Job Summary',
-          columns: ['Month', 'Jobs', 'Est. Revenue', 'Actual Revenue'],
-          rows,
-          summary: ''
-        })
-      } else if (selectedReport === 'actual_vs_estimated') {
-        const [jobsRes, clientsRes, crewsRes] = await Promise.all([
-          axios.get(`${API_URL}/jobs`),
-          axios.get(`${API_URL}/clients`),
-          axios.get(`${API_URL}/work-crews`)
-        ])
-        
-        const clientMap = {}
-        clientsRes.data.forEach(c => { clientMap[c.account_id] = c.name })
-        
-        const crewMap = {}
-        crewsRes.data.forEach(c => { crewMap[c.crew_id] = c.name })
-        
-        const jobsWithActuals = jobsRes.data.filter(j => j.actual_total_cost !== null)
-        
-        const rows = jobsWithActuals.map(j => {
-          const variance = j.actual_total_cost - j.cost_estimate
-          const variancePct = j.cost_estimate ? ((variance / j.cost_estimate) * 100).toFixed(1) : 0
-          return {
-            'Job ID': j.job_id,
-            Client: clientMap[j.client_account_id] || 'Unknown',
-            'Scheduled': j.scheduled_date,
-            'Estimated': `$${j.cost_estimate.toFixed(2)}`,
-            'Actual': `$${j.actual_total_cost.toFixed(2)}`,
-            'Variance': `${variance >= 0 ? '+' : ''}${variance.toFixed(2)} (${variancePct}%)`
-          }
-        })
-        
-        const totalEst = jobsWithActuals.reduce((sum, j) => sum + j.cost_estimate, 0)
-        const totalActual = jobsWithActuals.reduce((sum, j) => sum + (j.actual_total_cost || 0), 0)
-        
-        setReportData({
-          title: 'Actual vs Estimated',
-          columns: ['Job ID', 'Client', 'Scheduled', 'Estimated', 'Actual', 'Variance'],
-          rows,
-          summary: `Jobs with actuals: ${jobsWithActuals.length} | Total Estimated: $${totalEst.toFixed(2)} | Total Actual: $${totalActual.toFixed(2)}`
-        })
-      } else if (selectedReport === 'client_history') {
-        const [clientsRes, jobsRes, estimatesRes] = await Promise.all([
-          axios.get(`${API_URL}/clients`),
-          axios.get(`${API_URL}/jobs`),
-          axios.get(`${API_URL}/estimates`)
-        ])
-        
-        const clientJobs = {}
-        clientsRes.data.forEach(c => {
-          clientJobs[c.account_id] = { 
-            name: c.name, 
-            jobs: [], 
-            estimates: [],
-            totalJobValue: 0 
-          }
-        })
-        
-        jobsRes.data.forEach(j => {
-          if (clientJobs[j.client_account_id]) {
-            clientJobs[j.client_account_id].jobs.push(j)
-            clientJobs[j.client_account_id].totalJobValue += j.cost_estimate
-          }
-        })
-        
-        estimatesRes.data.forEach(e => {
-          if (clientJobs[e.client_id]) {
-            clientJobs[e.client_id].estimates.push(e)
-          }
-        })
-        
-        const rows = Object.values(clientJobs)
-          .filter(c => c.jobs.length > 0 || c.estimates.length > 0)
-          .sort((a, b) => b.totalJobValue - a.totalJobValue)
-          .map(c => ({
-            Client: c.name,
-            'Total Jobs': c.jobs.length,
-            'Total Estimates': c.estimates.length,
-            'Job Value': `$${c.totalJobValue.toFixed(2)}`,
-            'Last Job': c.jobs.length > 0 ? c.jobs.sort((a,b) => new Date(b.scheduled_date) - new Date(a.scheduled_date))[0].scheduled_date : '—'
-          }))
-        
-        setReportData({
-          title: 'Client Job History',
-          columns: ['Client', 'Total Jobs', 'Total Estimates', 'Job Value', 'Last Job'],
-          rows,
-          summary: `Total Clients with History: ${rows.length}`
-        })
-      }
+      // Reports are aggregated server-side and come back ready to render
+      const res = await axios.get(`${API_URL}/reports/${selectedReport}`)
+      setReportData(res.data)
     } catch (e) {
       onError('Failed to run report')
     } finally {